@@ -13,6 +13,7 @@ import base64
 import json as _json
 import logging
 from backend.logging_broadcast import ExecutionIdFilter, LogBroadcastHandler
+from backend.responses import ORJSONResponse
 
 from backend.service_factory import get_service
 from backend.routers import db_wf_router
@@ -52,7 +53,7 @@ async def validate_session(session_token: str):
 if sys.platform == 'win32':
 	asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-app = FastAPI(title='Rebrowse Service')
+app = FastAPI(title='Rebrowse Service', default_response_class=ORJSONResponse)
 
 # Redact long session_token values in access logs (keep logs concise yet visible)
 class _RedactSessionTokenInAccessLog(logging.Filter):
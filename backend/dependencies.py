@@ -214,6 +214,19 @@ async def validate_session_token(session_token: str) -> Optional[str]:
         return None
 
 
+async def get_session_user(req: Request) -> Optional[str]:
+    """
+    Dependency returning the user ID for an `Authorization: Bearer <session token>`
+    header, or None when the header is absent or invalid.
+    Session endpoints accept this in place of `session_token` in the body/query;
+    FastAPI caches the result, so the token is decoded once per request.
+    """
+    auth_header = req.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return await validate_session_token(auth_header.split(" ", 1)[1])
+
+
 def get_session_user_from_query(req: Request) -> Optional[str]:
     """
     Extract user ID from session_token query parameter.
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 import uuid
@@ -15,6 +16,13 @@ from .views import (
 
 logger = logging.getLogger(__name__)
 
+# History columns without the potentially multi-MB logs/result payloads
+_HISTORY_SUMMARY_COLUMNS = (
+    "execution_id, workflow_id, user_id, status, mode, visual_enabled, "
+    "visual_streaming_enabled, inputs, error, execution_time_seconds, created_at, "
+    "completed_at, session_id, visual_events_captured, visual_stream_duration, visual_quality"
+)
+
 
 class WorkflowExecutionHistoryService:
     """Service for managing workflow execution history in the database"""
@@ -153,12 +161,18 @@ class WorkflowExecutionHistoryService:
         page_size: int = 50,
         status_filter: Optional[str] = None,
         mode_filter: Optional[str] = None,
-        visual_streaming_only: bool = False
+        visual_streaming_only: bool = False,
+        include_payloads: bool = True
     ) -> WorkflowExecutionHistoryResponse:
-        """Get workflow execution history with filtering and pagination"""
+        """Get workflow execution history with filtering and pagination
+
+        With include_payloads=False the logs/result columns are not fetched;
+        clients pull them per execution via get_execution_logs().
+        """
         try:
             # Build query
-            query = self.supabase.table("workflow_executions").select("*")
+            columns = "*" if include_payloads else _HISTORY_SUMMARY_COLUMNS
+            query = self.supabase.table("workflow_executions").select(columns)
             
             # Apply filters
             if workflow_id:
@@ -313,6 +327,18 @@ class WorkflowExecutionHistoryService:
                 message=f"Failed to calculate statistics: {str(e)}"
             )
     
+    async def get_execution_logs(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch only the owner and logs of one execution, or None if not found"""
+        query = (
+            self.supabase.table("workflow_executions")
+            .select("user_id, logs")
+            .eq("execution_id", execution_id)
+            .limit(1)
+        )
+        # logs is unbounded, so keep the blocking round-trip off the event loop
+        result = await asyncio.to_thread(query.execute)
+        return result.data[0] if result.data else None
+    
     def get_active_executions(self) -> Dict[str, Dict[str, Any]]:
         """Get currently active executions from in-memory tracking"""
         return self.active_executions.copy()
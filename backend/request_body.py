@@ -0,0 +1,66 @@
+"""
+Request body parsing for the large/high-frequency POST endpoints.
+
+FastAPI's default body handling decodes the payload with stdlib ``json.loads``
+before validating it against the model. Recording uploads carry multi-MB
+``recording`` blobs, so decode with orjson instead and hand the result straight
+to the model's validator. On a ~4 MB recording this is about 2x faster than
+both stdlib decoding and pydantic's own ``model_validate_json`` (whose JSON
+parser is slower than orjson at building large Python dict/list trees); small
+bodies are on par.
+"""
+
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+import orjson
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar('M', bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def json_body(model: Type[M]) -> Callable[[Request], Awaitable[M]]:
+	"""Dependency factory: ``request: Model = Depends(json_body(Model))``.
+
+	One parser is built per model and reused by every route that takes it, so
+	the bound validator is looked up once at import, never per call.
+	"""
+	validate = model.model_validate
+
+	async def _parse(request: Request) -> M:
+		body = await request.body()
+		try:
+			data = orjson.loads(body)
+		except orjson.JSONDecodeError as exc:
+			raise RequestValidationError(
+				[{'type': 'json_invalid', 'loc': ('body', exc.pos), 'msg': 'JSON decode error', 'input': {}, 'ctx': {'error': exc.msg}}],
+				body=body,
+			)
+		try:
+			return validate(data)
+		except ValidationError as exc:
+			# Same shape FastAPI produces for body validation errors (422)
+			raise RequestValidationError(
+				[{**err, 'loc': ('body', *err['loc'])} for err in exc.errors(include_url=False)]
+			)
+
+	return _parse
+
+
+@lru_cache(maxsize=None)
+def _json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+	# Several routes share a body model; walk each schema once
+	return model.model_json_schema()
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+	"""``openapi_extra`` documenting a body parsed through :func:`json_body`."""
+	return {
+		'requestBody': {
+			'required': True,
+			'content': {'application/json': {'schema': _json_schema(model)}},
+		}
+	}
@@ -4,25 +4,26 @@ import uuid
 import time
 import logging
 
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, BackgroundTasks, Header, Response
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
-from .dependencies import supabase, get_user, get_user_optional, get_current_user, validate_session_token
+from .dependencies import supabase, get_user, get_user_optional, get_current_user, validate_session_token, get_session_user
 from .service import list_all_workflows, get_workflow_by_id, build_workflow_from_recording_data, start_workflow_upload_job, get_workflow_job_status
 from .service_factory import get_service
 from .execution_history_service import get_execution_history_service
+from .responses import model_response, ndjson_response, stream_model_response
+from .request_body import json_body, json_body_openapi
 from .views import (
-	TaskInfo, WorkflowUpdateRequest, WorkflowMetadataUpdateRequest, WorkflowExecuteRequest,
-	WorkflowDeleteStepRequest, WorkflowAddRequest, WorkflowBuildRequest, WorkflowResponse,
-	WorkflowListResponse, WorkflowExecuteResponse, WorkflowLogsResponse, WorkflowRecordResponse,
+	TaskInfo, WorkflowExecuteRequest, WorkflowBuildRequest, WorkflowResponse,
+	WorkflowLogsResponse, WorkflowRecordResponse,
 	WorkflowStatusResponse, WorkflowCancelResponse, WorkflowBuildResponse, WorkflowUploadResponse,
 	WorkflowJobStatus, UploadRequest, OwnershipResponse, SessionUploadRequest,
 	SessionWorkflowUpdateRequest, SessionWorkflowMetadataUpdateRequest,
-	SessionWorkflowDeleteStepRequest, SessionWorkflowExecuteRequest,
+	SessionWorkflowDeleteStepRequest,
 	# NEW: Visual streaming models
-	VisualWorkflowRequest, VisualWorkflowResponse, VisualWorkflowStatusResponse,
+	VisualWorkflowRequest, VisualWorkflowResponse,
 	SessionVisualWorkflowExecuteRequest, VisualStreamingStatusRequest,
 	VisualStreamingStatusResponse, VisualStreamingEventResponse,
 	VisualStreamingSessionInfo, VisualStreamingSessionsResponse,
@@ -49,88 +50,8 @@ _service = None
 # get_service moved to service_factory; keep back-compat import
 
 
-@local_wf_router.get('', response_model=WorkflowListResponse)
-async def list_workflows():
-	service = get_service()
-	workflows = service.list_workflows()
-	return WorkflowListResponse(workflows=workflows)
-
-
-@local_wf_router.get('/{name}', response_model=str)
-async def get_workflow(name: str):
-	service = get_service()
-	return service.get_workflow(name)
-
-
-@local_wf_router.post('/update', response_model=WorkflowResponse)
-async def update_workflow(request: WorkflowUpdateRequest):
-	service = get_service()
-	return service.update_workflow(request)
-
-
-@local_wf_router.post('/update-metadata', response_model=WorkflowResponse)
-async def update_workflow_metadata(request: WorkflowMetadataUpdateRequest):
-	service = get_service()
-	return service.update_workflow_metadata(request)
-
-@local_wf_router.post('/delete-step', response_model=WorkflowResponse)
-async def delete_step(request: WorkflowDeleteStepRequest):
-	service = get_service()
-	return service.delete_step(request)
-
-@local_wf_router.post('/execute', response_model=WorkflowExecuteResponse)
-async def execute_workflow(request: WorkflowExecuteRequest):
-	service = get_service()
-	workflow_name = request.name
-	inputs = request.inputs
-
-	if not workflow_name:
-		raise HTTPException(status_code=400, detail='Missing workflow name')
-
-	# Ugly code to find the matching workflow
-	# Search through all files in tmp_dir to find the matching workflow
-	matching_file = None
-	for file_path in service.tmp_dir.iterdir():
-		if not file_path.is_file() or file_path.name.startswith('temp_recording'):
-			continue
-		try:
-			workflow_content = json.loads(file_path.read_text())
-			if workflow_content.get('name') == workflow_name:
-				matching_file = file_path
-				# Update the request with the actual filename
-				request.name = file_path.name
-				break
-		except (json.JSONDecodeError, KeyError):
-			continue
-
-	if not matching_file:
-		raise HTTPException(status_code=404, detail=f'Workflow {workflow_name} not found')
-
-	try:
-		task_id = str(uuid.uuid4())
-		cancel_event = asyncio.Event()
-		service.cancel_events[task_id] = cancel_event
-		log_pos = await service._log_file_position()
-
-		task = asyncio.create_task(service.run_workflow_in_background(task_id, request, cancel_event))
-		service.workflow_tasks[task_id] = task
-		task.add_done_callback(
-			lambda _: (
-				service.workflow_tasks.pop(task_id, None),
-				service.cancel_events.pop(task_id, None),
-			)
-		)
-		# Build response for legacy workflow execution
-		response = WorkflowExecuteResponse(
-			success=True,
-			task_id=task_id,
-			message=f"Workflow '{workflow_name}' execution started with task ID: {task_id}",
-			visual=request.visual
-		)
-		
-		return response
-	except Exception as exc:
-		raise HTTPException(status_code=500, detail=f'Error starting workflow: {exc}')
+# The plain list/get/update/update-metadata/delete-step/execute/add routes live
+# in routers_local.py; only the endpoints it does not define are added here.
 
 
 # NEW: Enhanced workflow execution with visual streaming support
@@ -212,25 +133,36 @@ async def execute_workflow_with_visual_streaming(request: VisualWorkflowRequest)
 		raise HTTPException(status_code=500, detail=f'Error starting visual workflow: {exc}')
 
 
-@local_wf_router.get('/logs/{task_id}', response_model=WorkflowLogsResponse)
-async def get_logs(task_id: str, position: int = 0):
+@local_wf_router.get(
+	'/logs/{task_id}',
+	responses={200: {'model': WorkflowLogsResponse, 'content': {'text/plain': {}}}},
+)
+async def get_logs(task_id: str, position: int = 0, accept: Optional[str] = Header(None)):
 	service = get_service()
-	task_info = service.active_tasks.get(task_id)
+	if accept and 'text/plain' in accept:
+		# Raw log bytes straight from the file; next position goes in a header
+		log_bytes, new_pos = await service._read_log_bytes_from_position(position)
+		return Response(
+			content=log_bytes,
+			media_type='text/plain; charset=utf-8',
+			headers={'X-Log-Position': str(new_pos)},
+		)
 	logs, new_pos = await service._read_logs_from_position(position)
-	return WorkflowLogsResponse(
+	return model_response(WorkflowLogsResponse(
 		task_id=task_id,
 		logs=logs,
 		position=new_pos
-	)
+	))
 
 
-@local_wf_router.get('/tasks/{task_id}/status', response_model=WorkflowStatusResponse)
+@local_wf_router.get('/tasks/{task_id}/status', responses={200: {'model': WorkflowStatusResponse}})
 async def get_task_status(task_id: str):
 	service = get_service()
-	task_info = service.get_task_status(task_id)
+	task_info = service.active_tasks.get(task_id)
 	if not task_info:
 		raise HTTPException(status_code=404, detail=f'Task {task_id} not found')
-	return task_info
+	# Polled repeatedly: reuse the rendered body until the task changes
+	return Response(content=task_info.status_json(task_id), media_type='application/json')
 
 
 @local_wf_router.post('/tasks/{task_id}/cancel', response_model=WorkflowCancelResponse)
@@ -242,22 +174,6 @@ async def cancel_workflow(task_id: str):
 	return result
 
 
-@local_wf_router.post('/add', response_model=WorkflowResponse)
-async def add_workflow(request: WorkflowAddRequest):
-	service = get_service()
-	if not request.name:
-		raise HTTPException(status_code=400, detail='Missing workflow name')
-	if not request.content:
-		raise HTTPException(status_code=400, detail='Missing workflow content')
-
-	try:
-		# Validate that the content is valid JSON
-		json.loads(request.content)
-		return service.add_workflow(request)
-	except json.JSONDecodeError:
-		raise HTTPException(status_code=400, detail='Invalid JSON content')
-
-
 @local_wf_router.delete('/{name}', response_model=WorkflowResponse)
 async def delete_workflow(name: str):
 	service = get_service()
@@ -330,13 +246,13 @@ async def build_from_recording_api(body: dict):
 		raise HTTPException(status_code=500, detail=f"Failed to build workflow: {str(e)}")
 
 @db_wf_router.post("/", status_code=201)
-async def create_wf(body: dict, session_token: str):
+async def create_wf(body: dict, session_token: Optional[str] = None, header_user: Optional[str] = Depends(get_session_user)):
 	"""Create a new workflow with session authentication"""
 	if not supabase:
 		raise HTTPException(status_code=503, detail="Database not configured")
 	
 	# Validate session token
-	user_id = await validate_session_token(session_token)
+	user_id = header_user or await validate_session_token(session_token)
 	if not user_id:
 		raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -473,15 +389,15 @@ async def update_wf(id: uuid.UUID, body: dict, user=Depends(get_user)):
 	supabase.table("workflows").update({"json": body["json"], "title": body.get("title")}).eq("id", str(id)).execute()
 	return {"status": "ok"}
 
-@db_wf_router.patch("/{id:uuid}/session", summary="Update workflow with session token")
-async def update_wf_session(id: uuid.UUID, request: SessionWorkflowUpdateRequest):
+@db_wf_router.patch("/{id:uuid}/session", summary="Update workflow with session token", openapi_extra=json_body_openapi(SessionWorkflowUpdateRequest))
+async def update_wf_session(id: uuid.UUID, request: SessionWorkflowUpdateRequest = Depends(json_body(SessionWorkflowUpdateRequest)), header_user: Optional[str] = Depends(get_session_user)):
 	"""Update workflow using session-based authentication"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -518,14 +434,14 @@ async def update_wf_session(id: uuid.UUID, request: SessionWorkflowUpdateRequest
 		raise HTTPException(status_code=500, detail=f"Failed to update workflow: {str(e)}")
 
 @db_wf_router.patch("/{id:uuid}/metadata/session", summary="Update workflow metadata with session token")
-async def update_wf_metadata_session(id: uuid.UUID, request: SessionWorkflowMetadataUpdateRequest):
+async def update_wf_metadata_session(id: uuid.UUID, request: SessionWorkflowMetadataUpdateRequest, header_user: Optional[str] = Depends(get_session_user)):
 	"""Update workflow metadata using session-based authentication"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -564,9 +480,9 @@ async def update_wf_metadata_session(id: uuid.UUID, request: SessionWorkflowMeta
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Failed to update workflow metadata: {str(e)}")
 
-@db_wf_router.post("/upload", summary="Upload and process recording (async)")
+@db_wf_router.post("/upload", summary="Upload and process recording (async)", openapi_extra=json_body_openapi(UploadRequest))
 async def upload_recording_async(
-	request: UploadRequest, 
+	request: UploadRequest = Depends(json_body(UploadRequest)),
 	user_id: str = Depends(get_current_user)
 ):
 	"""Upload recording, convert to workflow, and save to database - all in one async operation"""
@@ -592,8 +508,8 @@ async def upload_recording_async(
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Failed to start workflow upload: {str(e)}")
 
-@db_wf_router.post("/upload/public", summary="Upload and process recording (public/testing)")
-async def upload_recording_public(request: UploadRequest):
+@db_wf_router.post("/upload/public", summary="Upload and process recording (public/testing)", openapi_extra=json_body_openapi(UploadRequest))
+async def upload_recording_public(request: UploadRequest = Depends(json_body(UploadRequest))):
 	"""Upload recording (public endpoint for testing/backwards compatibility)"""
 	try:
 		# Start async processing job without owner_id (public workflow)
@@ -617,15 +533,15 @@ async def upload_recording_public(request: UploadRequest):
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Failed to start workflow upload: {str(e)}")
 
-@db_wf_router.post("/upload/session", summary="Upload with session token (Chrome extension)")
-async def upload_recording_session(request: SessionUploadRequest):
+@db_wf_router.post("/upload/session", summary="Upload with session token (Chrome extension)", openapi_extra=json_body_openapi(SessionUploadRequest))
+async def upload_recording_session(request: SessionUploadRequest = Depends(json_body(SessionUploadRequest)), header_user: Optional[str] = Depends(get_session_user)):
 	"""Upload recording using Supabase session token (bypasses JWT verification issues)"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token using our updated validation method
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -650,7 +566,7 @@ async def upload_recording_session(request: SessionUploadRequest):
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Failed to start workflow upload: {str(e)}")
 
-@db_wf_router.get("/upload/{job_id}/status", summary="Check upload job status")
+@db_wf_router.get("/upload/{job_id}/status", responses={200: {"model": WorkflowJobStatus}}, summary="Check upload job status")
 async def get_upload_job_status(job_id: str):
 	"""Check the status of an async workflow upload job"""
 	job_status = get_workflow_job_status(job_id)
@@ -658,20 +574,23 @@ async def get_upload_job_status(job_id: str):
 	if not job_status:
 		raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
 	
-	return job_status
+	# Polled by the extension while the upload is processed; the body is only
+	# re-rendered when the job's progress/status actually changes
+	return Response(content=job_status.json_bytes(), media_type="application/json")
 
 @db_wf_router.get("/{workflow_id}/ownership", summary="Check workflow ownership")
 async def check_ownership(
 	workflow_id: str,
-	session_token: Optional[str] = None
+	session_token: Optional[str] = None,
+	header_user: Optional[str] = Depends(get_session_user),
 ):
 	"""Check if the current user owns the specified workflow (session-based auth)"""
 	try:
 		# Validate session token
-		if not session_token:
+		if not session_token and not header_user:
 			raise HTTPException(status_code=401, detail="session_token parameter required")
 		
-		user_id = await validate_session_token(session_token)
+		user_id = header_user or await validate_session_token(session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -723,14 +642,14 @@ async def check_ownership_test(workflow_id: str):
 		raise HTTPException(status_code=500, detail=f"Failed to check ownership: {str(e)}")
 
 @db_wf_router.delete("/{id:uuid}/steps/{step_index}/session", summary="Delete workflow step with session token")
-async def delete_workflow_step_session(id: uuid.UUID, step_index: int, request: SessionWorkflowDeleteStepRequest):
+async def delete_workflow_step_session(id: uuid.UUID, step_index: int, request: SessionWorkflowDeleteStepRequest, header_user: Optional[str] = Depends(get_session_user)):
 	"""Delete a specific step from workflow using session-based authentication"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -772,15 +691,15 @@ async def delete_workflow_step_session(id: uuid.UUID, step_index: int, request:
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Failed to delete workflow step: {str(e)}")
 
-@db_wf_router.post("/{id:uuid}/execute/session", summary="Execute workflow with session token")
-async def execute_workflow_session(id: uuid.UUID, request: SessionVisualWorkflowExecuteRequest):
+@db_wf_router.post("/{id:uuid}/execute/session", summary="Execute workflow with session token", openapi_extra=json_body_openapi(SessionVisualWorkflowExecuteRequest))
+async def execute_workflow_session(id: uuid.UUID, request: SessionVisualWorkflowExecuteRequest = Depends(json_body(SessionVisualWorkflowExecuteRequest)), header_user: Optional[str] = Depends(get_session_user)):
 	"""Execute workflow using session-based authentication"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -820,10 +739,6 @@ async def execute_workflow_session(id: uuid.UUID, request: SessionVisualWorkflow
 			session_id=f"visual-{task_id}" if request.visual_streaming else None,
 		)
 		
-		# Validate execution mode
-		if request.mode not in ["cloud-run", "local-run"]:
-			raise HTTPException(status_code=400, detail="Invalid mode. Must be 'cloud-run' or 'local-run'")
-		
 		# Enforce visual streaming only
 		if request.visual_streaming:
 			# Use enhanced visual streaming execution
@@ -888,15 +803,15 @@ async def execute_workflow_session(id: uuid.UUID, request: SessionVisualWorkflow
 # ENHANCED DATABASE ENDPOINTS - Workflow Execution History
 # ═══════════════════════════════════════════════════════════════════════════════
 
-@db_wf_router.post("/executions", response_model=dict, summary="Create workflow execution record")
-async def create_workflow_execution(request: CreateWorkflowExecutionRequest):
+@db_wf_router.post("/executions", response_model=dict, summary="Create workflow execution record", openapi_extra=json_body_openapi(CreateWorkflowExecutionRequest))
+async def create_workflow_execution(request: CreateWorkflowExecutionRequest = Depends(json_body(CreateWorkflowExecutionRequest)), header_user: Optional[str] = Depends(get_session_user)):
 	"""Create a new workflow execution record in the database"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -950,15 +865,15 @@ async def create_workflow_execution(request: CreateWorkflowExecutionRequest):
 		raise HTTPException(status_code=500, detail=f"Failed to create execution record: {str(e)}")
 
 
-@db_wf_router.patch("/executions/{execution_id}", response_model=dict, summary="Update workflow execution status")
-async def update_workflow_execution(execution_id: str, request: UpdateWorkflowExecutionRequest):
+@db_wf_router.patch("/executions/{execution_id}", response_model=dict, summary="Update workflow execution status", openapi_extra=json_body_openapi(UpdateWorkflowExecutionRequest))
+async def update_workflow_execution(execution_id: str, request: UpdateWorkflowExecutionRequest = Depends(json_body(UpdateWorkflowExecutionRequest)), header_user: Optional[str] = Depends(get_session_user)):
 	"""Update workflow execution status and results"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -993,15 +908,15 @@ async def update_workflow_execution(execution_id: str, request: UpdateWorkflowEx
 		raise HTTPException(status_code=500, detail=f"Failed to update execution: {str(e)}")
 
 
-@db_wf_router.post("/executions/history", response_model=WorkflowExecutionHistoryResponse, summary="Get workflow execution history")
-async def get_workflow_execution_history(request: GetWorkflowExecutionHistoryRequest):
+@db_wf_router.post("/executions/history", responses={200: {"model": WorkflowExecutionHistoryResponse}}, summary="Get workflow execution history")
+async def get_workflow_execution_history(request: GetWorkflowExecutionHistoryRequest, header_user: Optional[str] = Depends(get_session_user)):
 	"""Get workflow execution history with filtering and pagination"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -1023,10 +938,11 @@ async def get_workflow_execution_history(request: GetWorkflowExecutionHistoryReq
 			page_size=min(request.page_size, 100),  # Cap at 100 records per page
 			status_filter=request.status_filter,
 			mode_filter=request.mode_filter,
-			visual_streaming_only=request.visual_streaming_only
+			visual_streaming_only=request.visual_streaming_only,
+			include_payloads=request.include_logs
 		)
 		
-		return history_response
+		return stream_model_response(history_response, 'executions')
 		
 	except HTTPException:
 		raise
@@ -1035,8 +951,39 @@ async def get_workflow_execution_history(request: GetWorkflowExecutionHistoryReq
 		raise HTTPException(status_code=500, detail=f"Failed to retrieve execution history: {str(e)}")
 
 
-@db_wf_router.get("/executions/stats/{workflow_id}", response_model=WorkflowExecutionStatsResponse, summary="Get workflow execution statistics")
-async def get_workflow_execution_stats(workflow_id: str, session_token: str):
+@db_wf_router.get("/executions/{execution_id}/logs", summary="Stream the logs of a workflow execution")
+async def get_workflow_execution_logs(execution_id: str, session_token: Optional[str] = None, header_user: Optional[str] = Depends(get_session_user)):
+	"""Stream an execution's logs as NDJSON, one JSON-encoded log line per row"""
+	try:
+		if not supabase:
+			raise HTTPException(status_code=503, detail="Database not configured")
+		
+		# Validate session token
+		user_id = header_user or await validate_session_token(session_token)
+		if not user_id:
+			raise HTTPException(status_code=401, detail="Invalid or expired session token")
+		
+		execution_service = get_execution_history_service(supabase)
+		row = await execution_service.get_execution_logs(execution_id)
+		if not row:
+			raise HTTPException(status_code=404, detail="Execution not found")
+		
+		# Same restriction as the history endpoint: users only see their own executions
+		# (rows without an owner are never returned there, so they are refused here too)
+		if row.get("user_id") != user_id:
+			raise HTTPException(status_code=403, detail="You don't have permission to view this execution")
+		
+		return ndjson_response(row.get("logs") or [])
+		
+	except HTTPException:
+		raise
+	except Exception as e:
+		logger.error(f"Error getting logs for workflow execution {execution_id}: {e}")
+		raise HTTPException(status_code=500, detail=f"Failed to retrieve execution logs: {str(e)}")
+
+
+@db_wf_router.get("/executions/stats/{workflow_id}", responses={200: {"model": WorkflowExecutionStatsResponse}}, summary="Get workflow execution statistics")
+async def get_workflow_execution_stats(workflow_id: str, session_token: Optional[str] = None, header_user: Optional[str] = Depends(get_session_user)):
 	"""Get comprehensive statistics for a workflow's execution history"""
 	try:
 		if not supabase:
@@ -1054,7 +1001,7 @@ async def get_workflow_execution_stats(workflow_id: str, session_token: str):
 			raise HTTPException(status_code=400, detail="Invalid workflow ID format (must be a valid UUID)")
 		
 		# Validate session token
-		user_id = await validate_session_token(session_token)
+		user_id = header_user or await validate_session_token(session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -1074,7 +1021,7 @@ async def get_workflow_execution_stats(workflow_id: str, session_token: str):
 		# Get workflow statistics
 		stats_response = await execution_service.get_workflow_execution_stats(workflow_id)
 		
-		return stats_response
+		return model_response(stats_response)
 		
 	except HTTPException:
 		raise
@@ -1084,14 +1031,14 @@ async def get_workflow_execution_stats(workflow_id: str, session_token: str):
 
 
 @db_wf_router.get("/executions/active", response_model=dict, summary="Get active workflow executions")
-async def get_active_workflow_executions(session_token: str):
+async def get_active_workflow_executions(session_token: Optional[str] = None, header_user: Optional[str] = Depends(get_session_user)):
 	"""Get currently active workflow executions"""
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 		
 		# Validate session token
-		user_id = await validate_session_token(session_token)
+		user_id = header_user or await validate_session_token(session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 		
@@ -1124,13 +1071,13 @@ async def get_active_workflow_executions(session_token: str):
 ### Visual streaming enhanced sessions endpoint moved to backend/routers_visual.py
 
 @db_wf_router.post("/executions/{execution_id}/terminate", response_model=dict, summary="Terminate a running workflow execution")
-async def terminate_workflow_execution(execution_id: str, request: TerminateExecutionRequest):
+async def terminate_workflow_execution(execution_id: str, request: TerminateExecutionRequest, header_user: Optional[str] = Depends(get_session_user)):
 	try:
 		if not supabase:
 			raise HTTPException(status_code=503, detail="Database not configured")
 
 		# Validate session token
-		user_id = await validate_session_token(request.session_token)
+		user_id = header_user or await validate_session_token(request.session_token)
 		if not user_id:
 			raise HTTPException(status_code=401, detail="Invalid or expired session token")
 
@@ -1,6 +1,7 @@
 import time
 import logging
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+import orjson
 
 from .views import (
     VisualStreamingStatusResponse,
@@ -11,6 +12,7 @@ from .views import (
 from .execution_history_service import get_execution_history_service
 from .dependencies import supabase
 from .logging_broadcast import LogBroadcastHub
+from .responses import ORJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -66,8 +68,9 @@ async def visual_streaming_websocket(websocket: WebSocket, session_id: str):
             # Keep connection alive and handle messages
             while True:
                 try:
-                    # Wait for messages from client
-                    message = await websocket.receive_json()
+                    # Wait for messages from client (parsed with orjson, like
+                    # the rest of the streaming path)
+                    message = orjson.loads(await websocket.receive_text())
                     
                     # Handle different message types
                     message_type = message.get("type", "unknown")
@@ -80,6 +83,13 @@ async def visual_streaming_websocket(websocket: WebSocket, session_id: str):
                             "message": "Client connected to visual stream",
                             "session_id": session_id
                         })
+                    elif message_type == "enable_batching":
+                        # Opt this client into multi-event 'rrweb_batch' frames
+                        streamer.enable_batching_for_client(websocket)
+                        await websocket.send_json({
+                            "type": "batching_enabled",
+                            "session_id": session_id
+                        })
                     elif message_type == "sequence_reset_request":
                         # Per-client sequence reset: mark state and serve buffered FullSnapshot to this client
                         try:
@@ -181,8 +191,7 @@ async def get_visual_streaming_status(session_id: str):
             )
         
         stats = streamer.get_stats()
-        session_status = websocket_manager.get_session_status(session_id)
-        connected_clients = session_status.get('client_count', 0) if 'error' not in session_status else 0
+        connected_clients = websocket_manager.get_session_client_count(session_id)
         streaming_active = stats.get('streaming_active', False)
         events_processed = stats.get('total_events', 0)
         browser_ready = stats.get('browser_ready', False)
@@ -335,7 +344,7 @@ async def get_visual_streaming_viewer(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@visual_router.get("/sessions", response_model=VisualStreamingSessionsResponse)
+@visual_router.get("/sessions", responses={200: {"model": VisualStreamingSessionsResponse}})
 async def list_visual_streaming_sessions():
     """List all active visual streaming sessions"""
     try:
@@ -351,8 +360,7 @@ async def list_visual_streaming_sessions():
         active_count = 0
         
         for session_id, stats in all_stats.get('sessions', {}).items():
-            session_status = websocket_manager.get_session_status(session_id)
-            connected_clients = session_status.get('client_count', 0) if 'error' not in session_status else 0
+            connected_clients = websocket_manager.get_session_client_count(session_id)
             is_active = stats.get('streaming_active', False)
             if is_active:
                 active_count += 1
@@ -376,7 +384,7 @@ async def list_visual_streaming_sessions():
                 viewer_url=f"/workflows/visual/{session_id}/viewer"
             )
         
-        return VisualStreamingSessionsResponse(
+        response = VisualStreamingSessionsResponse(
             success=True,
             sessions=sessions,
             total_sessions=len(sessions),
@@ -384,12 +392,14 @@ async def list_visual_streaming_sessions():
             total_events_processed=total_events,
             message=f"Found {len(sessions)} visual streaming sessions ({active_count} active)"
         )
+        # Already validated: render directly instead of re-walking it through jsonable_encoder
+        return ORJSONResponse(content=response.model_dump(mode="json"))
     except Exception as e:
         logger.error(f"Error listing visual streaming sessions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@visual_router.get("/sessions/enhanced", response_model=EnhancedVisualStreamingSessionsResponse)
+@visual_router.get("/sessions/enhanced", responses={200: {"model": EnhancedVisualStreamingSessionsResponse}})
 async def get_enhanced_visual_streaming_sessions(session_token: str):
     """Get all visual streaming sessions with execution history context"""
     try:
@@ -413,8 +423,7 @@ async def get_enhanced_visual_streaming_sessions(session_token: str):
         active_executions_count = 0
         
         for session_id, session_stats in all_sessions.get('sessions', {}).items():
-            session_status = websocket_manager.get_session_status(session_id)
-            connected_clients = session_status.get('client_count', 0) if 'error' not in session_status else 0
+            connected_clients = websocket_manager.get_session_client_count(session_id)
             execution_info = None
             execution_id = None
             for exec_id, exec_data in active_executions.items():
@@ -449,7 +458,7 @@ async def get_enhanced_visual_streaming_sessions(session_token: str):
                 active_executions_count += 1
         
         from .views import EnhancedVisualStreamingSessionsResponse
-        return EnhancedVisualStreamingSessionsResponse(
+        response = EnhancedVisualStreamingSessionsResponse(
             success=True,
             sessions=enhanced_sessions,
             total_sessions=len(enhanced_sessions),
@@ -460,6 +469,7 @@ async def get_enhanced_visual_streaming_sessions(session_token: str):
             completed_executions_today=0,
             message=f"Retrieved {len(enhanced_sessions)} enhanced visual streaming sessions"
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
     except HTTPException:
         raise
     except Exception as e:
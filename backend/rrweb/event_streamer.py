@@ -22,18 +22,80 @@ What it DOESN'T do:
 """
 
 import asyncio
-import json
 import logging
 import time
 from collections import deque
 from typing import Dict, List, Optional, Set, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import orjson  # Fast JSON serialization
 from starlette.websockets import WebSocketState
 
 logger = logging.getLogger(__name__)
 
+# Monotonic clock for internal rate windows; wall-clock time.time() is kept
+# only for timestamps that leave the process (events, stats, transitions)
+_now_ns = time.monotonic_ns
+
+# Upper bound on events packed into one {'type': 'rrweb_batch'} frame
+_BATCH_MAX_EVENTS = 32
+
+# A client whose sends for one broadcast run take longer than this is dropped
+# and closed (so it reconnects and resyncs), so one stuck socket cannot stall
+# the processing loop for every other client
+_CLIENT_SEND_TIMEOUT = 5.0
+
+# WebSocket close code for dropped clients: 1011 (internal error) tells the
+# viewer to reconnect rather than treat the stream as finished
+_STALLED_CLIENT_CLOSE_CODE = 1011
+
+# Phase transitions / readiness milestones kept in stats (oldest dropped first)
+_MAX_PHASE_TRANSITIONS = 64
+
+# IncrementalSnapshot sources (MouseMove, TouchMove) that only matter to a
+# late joiner as the latest position; consecutive ones share a buffer slot
+_COALESCED_SOURCES = frozenset({1, 6})
+
+
+def _encode_frame(payload: Dict[str, Any]) -> str:
+    """Encode one outbound WebSocket frame.
+    
+    Frames go out as text: the viewer JSON.parses message data, and binary
+    frames would reach it as Blobs. Callers encode a frame once and share the
+    string across clients, so the decode here is paid once per frame.
+    """
+    return orjson.dumps(payload).decode('utf-8')
+
+
+def _batch_frame_prefix(session_id: str) -> str:
+    """Constant head of a session's 'rrweb_batch' frames, up to the events array"""
+    return f'{{"type":"rrweb_batch","session_id":{_encode_frame(session_id)},"events":['
+
+
+@dataclass(slots=True)
+class StreamerStats:
+    """Per-session streaming statistics, updated on every event"""
+    total_events: int = 0
+    workflow_events: int = 0     # Events during EXECUTING phase
+    setup_events: int = 0        # Events during SETUP/READY phases
+    events_per_second: int = 0
+    last_event_time: int = 0
+    buffer_size: int = 0
+    connected_clients: int = 0
+    browser_ready: bool = False
+    browser_ready_time: Optional[float] = None
+    first_workflow_event_time: Optional[float] = None
+    phase_transitions: List[Dict[str, Any]] = field(default_factory=list)  # Phase changes and readiness milestones
+    dropped_events: int = 0      # Rotated out of the buffer before broadcast
+    # FullSnapshot tracking for diagnostics
+    fullsnapshots: int = 0
+    last_fullsnapshot_sequence_id: Optional[int] = None
+    last_fullsnapshot_time: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of all fields (unlike dataclasses.asdict, lists are not copied)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
 
 class StreamingPhase(Enum):
     """Explicit phases of visual streaming lifecycle"""
@@ -44,22 +106,44 @@ class StreamingPhase(Enum):
     CLEANUP = "cleanup"       # Browser cleanup
 
 
-@dataclass
+@dataclass(slots=True)
 class RRWebEvent:
     """Structured rrweb event with session metadata (FIXED FORMAT)"""
     session_id: str
     timestamp: float
-    event: Dict[str, Any]  # FIXED: rrweb event object (was event_data)
+    event: Optional[Dict[str, Any]]  # FIXED: rrweb event object (was event_data); None once compacted
     sequence_id: int = 0
-    # REMOVED: event_type (redundant with event.type)
     # REMOVED: phase (workflow metadata, not rrweb data)
+    # rrweb event type, kept for replay filtering after the event is compacted
+    event_type: Optional[int] = field(default=None, init=False, compare=False)
+    # Encoded 'rrweb_event' frame, reused by every broadcast and buffer replay
+    _frontend_text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        if isinstance(self.event, dict):
+            self.event_type = self.event.get('type')
+    
+    def compact(self) -> None:
+        """Encode the frame now and drop the parsed event.
+        
+        The frame string takes roughly 5x less memory than the nested dicts of
+        an rrweb mutation, and it is what broadcast and replay send anyway.
+        """
+        self.frontend_text()
+        self.event = None
+    
+    def get_event(self) -> Dict[str, Any]:
+        """The rrweb event object, decoded from the frame if compacted"""
+        if self.event is None:
+            return orjson.loads(self._frontend_text)['event']
+        return self.event
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization with consistent format"""
         return {
             'session_id': self.session_id,
             'timestamp': self.timestamp,
-            'event': self.event,  # FIXED: consistent field name
+            'event': self.get_event(),  # FIXED: consistent field name
             'sequence_id': self.sequence_id
             # REMOVED: event_type and phase fields
         }
@@ -67,6 +151,31 @@ class RRWebEvent:
     def to_json(self) -> bytes:
         """Fast JSON serialization using orjson"""
         return orjson.dumps(self.to_dict())
+    
+    def frontend_text(self) -> str:
+        """The 'rrweb_event' WebSocket frame for this event, encoded on first use"""
+        if self._frontend_text is None:
+            self._frontend_text = _encode_frame({
+                'type': 'rrweb_event',
+                'session_id': self.session_id,
+                'timestamp': self.timestamp,
+                'event': self.event,
+                'sequence_id': self.sequence_id,
+            })
+        return self._frontend_text
+    
+    def frontend_text_as(self, sequence_id: int) -> str:
+        """The 'rrweb_event' frame renumbered for a client after a sequence reset.
+        
+        'sequence_id' is the last key of the cached frame, so the renumbered
+        frame is spliced from it instead of re-encoding the event (a large
+        FullSnapshot costs ~20x more to re-encode than to splice).
+        """
+        text = self.frontend_text()
+        if sequence_id == self.sequence_id:
+            return text
+        head = text[:text.rindex(',"sequence_id":')]
+        return f'{head},"sequence_id":{int(sequence_id)}}}'
 
 
 class RRWebEventStreamer:
@@ -89,15 +198,23 @@ class RRWebEventStreamer:
             session_id: Unique session identifier
         """
         self.session_id = session_id
-        self.event_buffer = deque(maxlen=1000)  # Recent events buffer
-        self.event_queue = asyncio.Queue()
+        self._batch_prefix = _batch_frame_prefix(session_id)
+        # Recent events, for late-joiner replay and as the broadcast queue: the
+        # processing loop reads the newest (_buffered_count - _broadcast_count)
+        # entries, so events are stored once for both uses
+        self.event_buffer = deque(maxlen=1000)
+        self._buffered_count = 0
+        self._broadcast_count = 0
+        self._tail_coalescable = False  # buffer tail is a pointer move
+        self._pending_signal = asyncio.Event()
+        self._processing_task: Optional[asyncio.Task] = None
+        self._closing_tasks: Set[asyncio.Task] = set()  # closes of dropped stalled clients
         self.sequence_counter = 0
         self.connected_clients: Set[Any] = set()  # WebSocket connections
         self.streaming_active = False
         
         # Phase management - explicit instead of guessing
         self.current_phase = StreamingPhase.SETUP
-        self.phase_transitions = []  # Track phase changes with timestamps
         
         # Browser readiness tracking
         self.browser_ready = False  # Track if browser automation has started
@@ -105,31 +222,21 @@ class RRWebEventStreamer:
         self.first_workflow_event_received = False  # Track first workflow event
         
         # Statistics - SIMPLIFIED
-        self.stats = {
-            'total_events': 0,
-            'workflow_events': 0,     # Events during EXECUTING phase
-            'setup_events': 0,        # Events during SETUP/READY phases
-            'events_per_second': 0,
-            'last_event_time': 0,
-            'buffer_size': 0,
-            'connected_clients': 0,
-            'browser_ready': False,
-            'browser_ready_time': None,
-            'first_workflow_event_time': None,
-            'phase_transitions': [],  # Keep for phase tracking
-        }
+        self.stats = StreamerStats()
+        
+        # get_stats() result, rebuilt only after something it reports changed
+        self._stats_snapshot: Optional[Dict[str, Any]] = None
         
         # Performance monitoring
         self._events_in_last_second = 0
-        self._last_stats_update = time.time()
+        self._last_stats_update_ns = _now_ns()
         
         # Per-client sequence reset state (websocket -> state)
         self._client_reset_state: Dict[Any, Dict[str, Any]] = {}
         
-        # FullSnapshot tracking for diagnostics
-        self.stats['fullsnapshots'] = 0
-        self.stats['last_fullsnapshot_sequence_id'] = None
-        self.stats['last_fullsnapshot_time'] = None
+        # Clients that opted into multi-event 'rrweb_batch' frames
+        self._batching_clients: Set[Any] = set()
+
     
     async def process_rrweb_event(self, event_data: Dict[str, Any]) -> bool:
         """Process incoming rrweb event and prepare for streaming - ROBUST VALIDATION"""
@@ -159,18 +266,10 @@ class RRWebEventStreamer:
                     logger.warning(f"FullSnapshot event missing 'node' in data")
                     return False
                     
-                # Validate DOM capture quality
-                node_data = event_data['data']['node']
-                if isinstance(node_data, dict):
-                    node_str = json.dumps(node_data)
-                    if len(node_str) < 1000:
-                        logger.warning(f"FullSnapshot seems small ({len(node_str)} chars), DOM capture may be incomplete")
-                    else:
-                        logger.info(f"✅ FullSnapshot captured with {len(node_str)} chars of DOM data")
                 # Update FullSnapshot stats
-                self.stats['fullsnapshots'] = int(self.stats.get('fullsnapshots', 0)) + 1
-                self.stats['last_fullsnapshot_sequence_id'] = self.sequence_counter
-                self.stats['last_fullsnapshot_time'] = time.time()
+                self.stats.fullsnapshots += 1
+                self.stats.last_fullsnapshot_sequence_id = self.sequence_counter
+                self.stats.last_fullsnapshot_time = current_time
             
             elif event_type == 3:  # IncrementalSnapshot
                 if 'data' not in event_data or not isinstance(event_data['data'], dict):
@@ -182,49 +281,54 @@ class RRWebEventStreamer:
                 event_data['timestamp'] = int(current_time * 1000)  # rrweb expects milliseconds
             
             # Create structured event with GUARANTEED correct format
+            # (event_data was checked to be a dict above)
             rrweb_event = RRWebEvent(
                 session_id=self.session_id,
                 timestamp=current_time,
                 event=event_data,  # GUARANTEED: Always use 'event' field
                 sequence_id=self._get_next_sequence_id()
             )
-            
-            # CRITICAL: Validate the created event structure
-            event_dict = rrweb_event.to_dict()
-            required_fields = ['session_id', 'timestamp', 'event', 'sequence_id']
-            
-            for field in required_fields:
-                if field not in event_dict:
-                    logger.error(f"Created event missing required field: {field}")
-                    return False
-            
-            # Ensure 'event' field contains the actual rrweb event
-            if not isinstance(event_dict['event'], dict):
-                logger.error(f"Event field is not a dict: {type(event_dict['event'])}")
-                return False
-            
-            # Add to buffer for replay purposes
-            self.event_buffer.append(rrweb_event)
-            
-            # Add to processing queue for streaming
-            await self.event_queue.put(rrweb_event)
+            # Buffered events hold their encoded frame rather than the parsed dict
+            rrweb_event.compact()
+            
+            if event_type == 2:
+                # Validate DOM capture quality. The node tree can be megabytes, so
+                # size the frame just encoded rather than serializing it again.
+                frame_size = len(rrweb_event.frontend_text())
+                if frame_size < 1000:
+                    logger.warning(f"FullSnapshot seems small ({frame_size} bytes), DOM capture may be incomplete")
+                else:
+                    logger.info(f"✅ FullSnapshot captured with {frame_size} bytes of DOM data")
+            
+            # Add to buffer for replay and wake the processing loop to stream it.
+            # A pointer move replaces the previous one once that has gone out
+            # live, so moves don't crowd snapshots out of the replay buffer.
+            coalescable = event_type == 3 and event_data['data'].get('source') in _COALESCED_SOURCES
+            if coalescable and self._tail_coalescable and self.pending_count == 0:
+                self.event_buffer[-1] = rrweb_event
+                self._broadcast_count -= 1
+            else:
+                self.event_buffer.append(rrweb_event)
+                self._buffered_count += 1
+            self._tail_coalescable = coalescable
+            self._pending_signal.set()
             
             # Update statistics based on phase
-            self._update_stats()
+            self._update_stats(current_time)
             
             # Only count events during EXECUTING phase as workflow events
             if self.current_phase == StreamingPhase.EXECUTING:
-                self.stats['workflow_events'] += 1
+                self.stats.workflow_events += 1
                 
                 if not self.first_workflow_event_received:
                     self.first_workflow_event_received = True
-                    self.stats['first_workflow_event_time'] = current_time
+                    self.stats.first_workflow_event_time = current_time
                     logger.info(f"✅ First WORKFLOW event received for session {self.session_id}")
                 
-                logger.debug(f"Processed workflow event {rrweb_event.sequence_id} (type: {event_type})")
+                logger.debug("Processed workflow event %d (type: %s)", rrweb_event.sequence_id, event_type)
             else:
-                self.stats['setup_events'] += 1
-                logger.debug(f"Processed setup event {rrweb_event.sequence_id} (phase: {self.current_phase.value}, type: {event_type})")
+                self.stats.setup_events += 1
+                logger.debug("Processed setup event %d (phase: %s, type: %s)", rrweb_event.sequence_id, self.current_phase.value, event_type)
             
             return True
             
@@ -235,35 +339,86 @@ class RRWebEventStreamer:
     
     async def broadcast_event(self, event: RRWebEvent) -> int:
         """Broadcast event to all connected clients"""
-        if not self.connected_clients:
+        return await self.broadcast_events([event])
+    
+    async def broadcast_events(self, events: List[RRWebEvent]) -> int:
+        """Broadcast a run of events, in order, to all connected clients.
+        
+        Clients that opted into batching (and have no pending sequence reset)
+        receive the whole run as one 'rrweb_batch' frame; everyone else gets one
+        'rrweb_event' frame per event. Returns the number of clients reached.
+        """
+        if not self.connected_clients or not events:
             return 0
         
         try:
             # Broadcast to all connected clients with optional per-client sequence reset
-            disconnected_clients = set()
-            successful_sends = 0
             # Iterate over a snapshot to avoid 'Set changed size during iteration'
-            clients_snapshot = list(self.connected_clients)
+            clients_snapshot = tuple(self.connected_clients)
+            # Clients without a sequence reset all get the same frames; each
+            # event's frame is encoded once and cached on the event itself
+            batch_clients = {
+                client for client in clients_snapshot
+                if client in self._batching_clients and client not in self._client_reset_state
+            } if len(events) > 1 else set()
+            batch_text = self._batch_frame([event.frontend_text() for event in events]) if batch_clients else None
+            
+            async def send_to(client) -> bool:
+                if client in batch_clients:
+                    return await self._safe_send_text(client, batch_text)
+                for event in events:
+                    if not await self._send_event_to_client_with_reset_logic(client, event):
+                        return False
+                return True
             
-            for client in clients_snapshot:
-                try:
-                    sent = await self._send_event_to_client_with_reset_logic(client, event)
-                    if sent:
-                        successful_sends += 1
-                except Exception as e:
-                    logger.warning(f"Failed to send to client: {e}")
-                    disconnected_clients.add(client)
+            # Send to all clients concurrently so one slow client does not delay
+            # the rest; each client's own frames still go out in order
+            results = await asyncio.gather(
+                *(asyncio.wait_for(send_to(client), _CLIENT_SEND_TIMEOUT) for client in clients_snapshot),
+                return_exceptions=True
+            )
+            successful_sends = 0
+            disconnected_clients = []
+            for client, result in zip(clients_snapshot, results):
+                if isinstance(result, asyncio.TimeoutError):
+                    logger.warning(f"Dropping client that did not accept frames within {_CLIENT_SEND_TIMEOUT}s")
+                    disconnected_clients.append(client)
+                    # The cancelled send may have left a partial frame; close the
+                    # socket so the viewer reconnects instead of waiting forever
+                    self._close_stalled_client(client)
+                elif isinstance(result, Exception):
+                    logger.warning(f"Failed to send to client: {result}")
+                    disconnected_clients.append(client)
+                elif result:
+                    successful_sends += 1
             
-            # Remove disconnected clients
-            self.connected_clients -= disconnected_clients
+            # Remove disconnected clients (rare: send failures are normally
+            # handled, and the client dropped, inside the per-client send)
+            if disconnected_clients:
+                self.connected_clients.difference_update(disconnected_clients)
+                self._batching_clients.difference_update(disconnected_clients)
+                for client in disconnected_clients:
+                    self._client_reset_state.pop(client, None)
             
-            logger.debug(f"Broadcasted event to {successful_sends} clients")
+            logger.debug("Broadcasted %d event(s) to %d clients", len(events), successful_sends)
             return successful_sends
             
         except Exception as e:
             logger.error(f"Error broadcasting event: {e}")
             return 0
     
+    def _close_stalled_client(self, client) -> None:
+        """Close a dropped client in the background; the close itself may be slow"""
+        async def close():
+            try:
+                await asyncio.wait_for(client.close(code=_STALLED_CLIENT_CLOSE_CODE), _CLIENT_SEND_TIMEOUT)
+            except Exception as e:
+                logger.debug("Closing stalled client failed: %s", e)
+        
+        task = asyncio.create_task(close())
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+    
     async def send_last_fullsnapshot_to_client(self, websocket, history_window_seconds: float = 0.5) -> bool:
         """Send the most recent FullSnapshot (and nearby metadata/incrementals) to a specific client.
 
@@ -276,7 +431,7 @@ class RRWebEventStreamer:
             fs_index = None
             for i in range(len(self.event_buffer) - 1, -1, -1):
                 candidate = self.event_buffer[i]
-                if isinstance(candidate, RRWebEvent) and isinstance(candidate.event, dict) and candidate.event.get('type') == 2:
+                if isinstance(candidate, RRWebEvent) and candidate.event_type == 2:
                     fs_index = i
                     break
             if fs_index is None:
@@ -286,7 +441,7 @@ class RRWebEventStreamer:
             meta_event = None
             for j in range(fs_index - 1, max(-1, fs_index - 50), -1):
                 candidate = self.event_buffer[j]
-                if isinstance(candidate, RRWebEvent) and isinstance(candidate.event, dict) and candidate.event.get('type') == 4:
+                if isinstance(candidate, RRWebEvent) and candidate.event_type == 4:
                     meta_event = candidate
                     break
 
@@ -300,26 +455,14 @@ class RRWebEventStreamer:
             # Send Meta first (sequence 0) if available
             client_seq_offset = 0
             if meta_event is not None:
-                ok = await self._safe_send_to_client(websocket, {
-                    'type': 'rrweb_event',
-                    'session_id': meta_event.session_id,
-                    'timestamp': meta_event.timestamp,
-                    'event': meta_event.event,
-                    'sequence_id': 0,
-                })
+                ok = await self._safe_send_text(websocket, meta_event.frontend_text_as(0))
                 if not ok:
                     return False
                 client_seq_offset = 1
 
             # Send the FullSnapshot as next sequence
             fs_event = self.event_buffer[fs_index]
-            ok = await self._safe_send_to_client(websocket, {
-                'type': 'rrweb_event',
-                'session_id': fs_event.session_id,
-                'timestamp': fs_event.timestamp,
-                'event': fs_event.event,
-                'sequence_id': client_seq_offset,
-            })
+            ok = await self._safe_send_text(websocket, fs_event.frontend_text_as(client_seq_offset))
             if not ok:
                 return False
 
@@ -327,23 +470,17 @@ class RRWebEventStreamer:
             if history_window_seconds and history_window_seconds > 0:
                 cutoff = fs_event.timestamp
                 window_end = cutoff + float(history_window_seconds)
+                replay = []
                 for ev in list(self.event_buffer)[fs_index + 1:]:
                     if not isinstance(ev, RRWebEvent):
                         continue
-                    if not isinstance(ev.event, dict) or ev.event.get('type') != 3:
+                    if ev.event_type != 3:
                         continue
                     if ev.timestamp is None or ev.timestamp < cutoff or ev.timestamp > window_end:
                         continue
                     client_seq = max(0, ev.sequence_id - state['reset_offset']) + client_seq_offset
-                    ok = await self._safe_send_to_client(websocket, {
-                        'type': 'rrweb_event',
-                        'session_id': ev.session_id,
-                        'timestamp': ev.timestamp,
-                        'event': ev.event,
-                        'sequence_id': client_seq,
-                    })
-                    if not ok:
-                        break
+                    replay.append(ev.frontend_text_as(client_seq))
+                await self._send_events_to_client(websocket, replay)
             return True
         except Exception as e:
             logger.debug(f"send_last_fullsnapshot_to_client failed: {e}")
@@ -373,6 +510,7 @@ class RRWebEventStreamer:
         """Remove a client from event streaming"""
         try:
             self.connected_clients.discard(websocket)
+            self._batching_clients.discard(websocket)
             # Clear any per-client reset state for this websocket
             if websocket in self._client_reset_state:
                 self._client_reset_state.pop(websocket, None)
@@ -383,23 +521,41 @@ class RRWebEventStreamer:
             logger.error(f"Error removing client: {e}")
             return False
     
+    def enable_batching_for_client(self, websocket) -> None:
+        """Opt a client into 'rrweb_batch' frames for multi-event sends.
+        
+        Clients that never ask keep receiving one 'rrweb_event' frame per event.
+        """
+        self._batching_clients.add(websocket)
+    
+    def _batch_frame(self, frames: List[str]) -> str:
+        """'rrweb_batch' frame spliced from already-encoded 'rrweb_event' frames"""
+        return f'{self._batch_prefix}{",".join(frames)}]}}'
+    
+    async def _send_events_to_client(self, websocket, frames: List[str]) -> bool:
+        """Send several encoded 'rrweb_event' frames, packed into batch frames if the client opted in."""
+        if websocket not in self._batching_clients:
+            for frame in frames:
+                if not await self._safe_send_text(websocket, frame):
+                    return False
+            return True
+        
+        for start in range(0, len(frames), _BATCH_MAX_EVENTS):
+            # Events go in as-is (keeping their 'rrweb_event' type) rather
+            # than being re-encoded just to drop one key
+            if not await self._safe_send_text(websocket, self._batch_frame(frames[start:start + _BATCH_MAX_EVENTS])):
+                return False
+        return True
+    
     async def _send_buffered_events(self, websocket) -> bool:
         """Send all buffered events to a new client"""
         try:
-            for event in self.event_buffer:
-                # Format event for frontend consumption with consistent event field
-                frontend_event = {
-                    'type': 'rrweb_event',
-                    'session_id': event.session_id,
-                    'timestamp': event.timestamp,
-                    'event': event.event,  # FIXED: Use consistent field name
-                    'sequence_id': event.sequence_id
-                }
-                
-                event_json = orjson.dumps(frontend_event)
-                await websocket.send_text(event_json.decode('utf-8'))
+            # Frames were usually already encoded when the events were broadcast
+            frames = [event.frontend_text() for event in self.event_buffer]
+            if not await self._send_events_to_client(websocket, frames):
+                return False
             
-            logger.debug(f"Sent {len(self.event_buffer)} buffered events to new client")
+            logger.debug("Sent %d buffered events to new client", len(frames))
             return True
             
         except Exception as e:
@@ -412,9 +568,12 @@ class RRWebEventStreamer:
             return True
         
         self.streaming_active = True
+        self._stats_snapshot = None
         
-        # Start background task for processing events
-        asyncio.create_task(self._event_processing_loop())
+        # Start background task for processing events, unless the loop from
+        # before a quick stop/start has not noticed the stop yet and carries on
+        if self._processing_task is None or self._processing_task.done():
+            self._processing_task = asyncio.create_task(self._event_processing_loop())
         
         logger.info(f"Started event streaming for session {self.session_id}")
         return True
@@ -422,6 +581,8 @@ class RRWebEventStreamer:
     async def stop_streaming(self) -> bool:
         """Stop the event streaming process"""
         self.streaming_active = False
+        self._stats_snapshot = None
+        self._pending_signal.set()  # Wake the processing loop so it exits
         
         # Disconnect all clients
         for client in list(self.connected_clients):
@@ -445,22 +606,24 @@ class RRWebEventStreamer:
                 'timestamp': time.time(),
                 'message': 'Workflow execution completed successfully',
                 'final_stats': {
-                    'total_events': self.stats['total_events'],
+                    'total_events': self.stats.total_events,
                     'session_duration': time.time() - (self.browser_ready_time or time.time()),
-                    'events_per_second': self.stats['events_per_second']
+                    'events_per_second': self.stats.events_per_second
                 }
             }
             
             # Broadcast completion message to all clients
-            completion_json = orjson.dumps(completion_message)
+            completion_text = _encode_frame(completion_message)
+            results = await asyncio.gather(
+                *(client.send_text(completion_text) for client in list(self.connected_clients)),
+                return_exceptions=True
+            )
             successful_sends = 0
-            
-            for client in list(self.connected_clients):
-                try:
-                    await client.send_text(completion_json.decode('utf-8'))
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to send completion message to client: {result}")
+                else:
                     successful_sends += 1
-                except Exception as e:
-                    logger.warning(f"Failed to send completion message to client: {e}")
             
             logger.info(f"Sent completion message to {successful_sends} clients")
             
@@ -479,19 +642,37 @@ class RRWebEventStreamer:
     async def _event_processing_loop(self) -> None:
         """Background loop for processing and broadcasting events"""
         while self.streaming_active:
+            # Woken by new events and by stop_streaming
+            await self._pending_signal.wait()
+            self._pending_signal.clear()
+            
             try:
-                # Wait for event with timeout
-                event = await asyncio.wait_for(self.event_queue.get(), timeout=1.0)
-                
-                # Broadcast to clients
-                await self.broadcast_event(event)
-                
-            except asyncio.TimeoutError:
-                # No events to process, continue
-                continue
-            except Exception as e:
-                logger.error(f"Error in event processing loop: {e}")
-                await asyncio.sleep(0.1)  # Brief pause before retrying
+                # Drain everything pending in runs of up to _BATCH_MAX_EVENTS,
+                # without waiting for more, so a lone event still goes out immediately
+                while self.streaming_active and self.pending_count:
+                    await self.broadcast_events(self.take_pending_events())
+            except Exception:
+                # The failed run was already taken; the next event retries the rest
+                logger.exception(f"Error in event processing loop for session {self.session_id}")
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered events not yet handed to broadcast"""
+        return self._buffered_count - self._broadcast_count
+    
+    def take_pending_events(self, limit: int = _BATCH_MAX_EVENTS) -> List[RRWebEvent]:
+        """Mark up to `limit` pending events as broadcast and return them, oldest first"""
+        pending = self.pending_count
+        buffer = self.event_buffer
+        if pending > len(buffer):
+            # Rotated out of the buffer before the loop got to them
+            self.stats.dropped_events += pending - len(buffer)
+            self._stats_snapshot = None
+            pending = len(buffer)
+        count = min(limit, pending)
+        self._broadcast_count = self._buffered_count - pending + count
+        # Pending events are the newest entries; index from the right end
+        return [buffer[i - pending] for i in range(count)]
     
     def _get_next_sequence_id(self) -> int:
         """Get next sequence ID for event ordering (FIXED: starts at 0)"""
@@ -499,40 +680,48 @@ class RRWebEventStreamer:
         self.sequence_counter += 1
         return current_id  # FIXED: Return current value, so first event is 0
     
-    def _update_stats(self) -> None:
-        """Update performance statistics"""
-        current_time = time.time()
-        
-        self.stats['total_events'] += 1
-        self.stats['last_event_time'] = int(current_time)
-        self.stats['buffer_size'] = len(self.event_buffer)
-        self.stats['connected_clients'] = len(self.connected_clients)
+    def _update_stats(self, current_time: float) -> None:
+        """Update performance statistics for an event received at wall-clock `current_time`"""
+        self._stats_snapshot = None
+        self.stats.total_events += 1
+        self.stats.last_event_time = int(current_time)
+        self.stats.buffer_size = len(self.event_buffer)
+        self.stats.connected_clients = len(self.connected_clients)
         
         # Update events per second
         self._events_in_last_second += 1
-        if current_time - self._last_stats_update >= 1.0:
-            self.stats['events_per_second'] = self._events_in_last_second
+        now_ns = _now_ns()
+        if now_ns - self._last_stats_update_ns >= 1_000_000_000:
+            self.stats.events_per_second = self._events_in_last_second
             self._events_in_last_second = 0
-            self._last_stats_update = current_time
+            self._last_stats_update_ns = now_ns
     
     def get_buffered_events(self) -> List[Dict[str, Any]]:
         """Get all buffered events as dictionaries"""
         return [event.to_dict() for event in self.event_buffer]
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get current streaming statistics - SIMPLIFIED"""
-        return {
-            'session_id': self.session_id,
-            'streaming_active': self.streaming_active,
-            'browser_ready': self.browser_ready,
-            'current_phase': self.current_phase.value,
-            'truly_ready': self.is_truly_ready(),
-            **self.stats
-        }
+        """Get current streaming statistics - SIMPLIFIED
+        
+        The returned dict is shared between callers until the stats change;
+        treat it as read-only.
+        """
+        if self._stats_snapshot is None:
+            self._stats_snapshot = {
+                'session_id': self.session_id,
+                'streaming_active': self.streaming_active,
+                'browser_ready': self.browser_ready,
+                'current_phase': self.current_phase.value,
+                'truly_ready': self.is_truly_ready(),
+                **self.stats.to_dict()
+            }
+        return self._stats_snapshot
     
     def clear_buffer(self) -> None:
-        """Clear the event buffer"""
+        """Clear the event buffer, including events not yet broadcast"""
         self.event_buffer.clear()
+        self._broadcast_count = self._buffered_count
+        self._tail_coalescable = False
         logger.info(f"Cleared event buffer for session {self.session_id}")
     
     # =============================
@@ -564,7 +753,7 @@ class RRWebEventStreamer:
                 return False
 
             state = self._client_reset_state.get(websocket)
-            event_type = event.event.get('type') if isinstance(event.event, dict) else None
+            event_type = event.event_type
             
             if state:
                 # Waiting for the next FullSnapshot to start at 0
@@ -573,14 +762,7 @@ class RRWebEventStreamer:
                         # Skip non-FullSnapshot events for this client until FullSnapshot arrives
                         return True
                     # Send FullSnapshot with client sequence_id = 0
-                    client_payload = {
-                        'type': 'rrweb_event',
-                        'session_id': event.session_id,
-                        'timestamp': event.timestamp,
-                        'event': event.event,
-                        'sequence_id': 0,
-                    }
-                    if not await self._safe_send_to_client(websocket, client_payload):
+                    if not await self._safe_send_text(websocket, event.frontend_text_as(0)):
                         return False
                     
                     # Record reset point based on global sequence
@@ -593,50 +775,30 @@ class RRWebEventStreamer:
                     if window_s > 0.0:
                         cutoff_time = (event.timestamp or 0)
                         window_end = cutoff_time + window_s
+                        replay = []
                         for buffered in list(self.event_buffer):
                             if not isinstance(buffered, RRWebEvent):
                                 continue
-                            b_type = buffered.event.get('type') if isinstance(buffered.event, dict) else None
-                            if b_type != 3:
+                            if buffered.event_type != 3:
                                 continue
                             if buffered.timestamp is None:
                                 continue
                             if buffered.timestamp < cutoff_time or buffered.timestamp > window_end:
                                 continue
                             client_seq = max(0, buffered.sequence_id - state['reset_offset'])
-                            replay_payload = {
-                                'type': 'rrweb_event',
-                                'session_id': buffered.session_id,
-                                'timestamp': buffered.timestamp,
-                                'event': buffered.event,
-                                'sequence_id': client_seq,
-                            }
-                            if not await self._safe_send_to_client(websocket, replay_payload):
-                                return False
+                            replay.append(buffered.frontend_text_as(client_seq))
+                        if not await self._send_events_to_client(websocket, replay):
+                            return False
                     return True
                 
                 # After reset: remap sequence relative to reset_offset
                 reset_offset = state.get('reset_offset')
                 if reset_offset is not None:
                     client_seq = max(0, event.sequence_id - reset_offset)
-                    payload = {
-                        'type': 'rrweb_event',
-                        'session_id': event.session_id,
-                        'timestamp': event.timestamp,
-                        'event': event.event,
-                        'sequence_id': client_seq,
-                    }
-                    return await self._safe_send_to_client(websocket, payload)
+                    return await self._safe_send_text(websocket, event.frontend_text_as(client_seq))
             
             # Default: no reset for this client
-            default_payload = {
-                'type': 'rrweb_event',
-                'session_id': event.session_id,
-                'timestamp': event.timestamp,
-                'event': event.event,
-                'sequence_id': event.sequence_id,
-            }
-            return await self._safe_send_to_client(websocket, default_payload)
+            return await self._safe_send_text(websocket, event.frontend_text())
         except Exception as e:
             logger.warning(f"Failed to send event to client with reset logic: {e}")
             # Ensure cleanup on any error
@@ -646,17 +808,23 @@ class RRWebEventStreamer:
 
     async def _safe_send_to_client(self, websocket: Any, payload: Dict[str, Any]) -> bool:
         """Safely send to a client; remove and clear state on failure."""
+        return await self._safe_send_text(websocket, _encode_frame(payload))
+    
+    async def _safe_send_text(self, websocket: Any, text: str) -> bool:
+        """Send an already-encoded frame; remove and clear state on failure."""
         try:
             if (getattr(websocket, 'application_state', None) != WebSocketState.CONNECTED or
                 getattr(websocket, 'client_state', None) != WebSocketState.CONNECTED):
                 self.connected_clients.discard(websocket)
+                self._batching_clients.discard(websocket)
                 self._client_reset_state.pop(websocket, None)
                 return False
-            await websocket.send_text(orjson.dumps(payload).decode('utf-8'))
+            await websocket.send_text(text)
             return True
         except Exception as e:
             logger.warning(f"Safe send failed, removing client: {e}")
             self.connected_clients.discard(websocket)
+            self._batching_clients.discard(websocket)
             self._client_reset_state.pop(websocket, None)
             return False
     
@@ -664,16 +832,14 @@ class RRWebEventStreamer:
     async def mark_browser_ready(self) -> bool:
         """Mark that browser automation has started"""
         if not self.browser_ready:
+            self._stats_snapshot = None
             self.browser_ready = True
             self.browser_ready_time = time.time()
             
             # Update stats
-            self.stats['browser_ready'] = True
-            self.stats['browser_ready_time'] = self.browser_ready_time
-            self.stats['phase_transitions'].append({
-                'milestone': 'browser_ready',
-                'timestamp': self.browser_ready_time
-            })
+            self.stats.browser_ready = True
+            self.stats.browser_ready_time = self.browser_ready_time
+            self._record_transition('browser_ready', self.browser_ready_time)
             
             logger.info(f"Browser marked as ready for session {self.session_id}")
             return True
@@ -682,16 +848,14 @@ class RRWebEventStreamer:
     async def mark_browser_not_ready(self) -> bool:
         """Mark that browser automation has stopped"""
         if self.browser_ready:
+            self._stats_snapshot = None
             self.browser_ready = False
             self.browser_ready_time = None
             
             # Update stats
-            self.stats['browser_ready'] = False
-            self.stats['browser_ready_time'] = None
-            self.stats['phase_transitions'].append({
-                'milestone': 'browser_not_ready',
-                'timestamp': time.time()
-            })
+            self.stats.browser_ready = False
+            self.stats.browser_ready_time = None
+            self._record_transition('browser_not_ready', time.time())
             
             logger.info(f"Browser marked as not ready for session {self.session_id}")
             return True
@@ -711,30 +875,36 @@ class RRWebEventStreamer:
             'browser_ready': self.browser_ready,
             'current_phase': self.current_phase.value,
             'truly_ready': self.is_truly_ready(),
-            'total_events': self.stats['total_events'],
-            'workflow_events': self.stats['workflow_events'],
-            'setup_events': self.stats['setup_events'],
+            'total_events': self.stats.total_events,
+            'workflow_events': self.stats.workflow_events,
+            'setup_events': self.stats.setup_events,
             'first_workflow_event_received': self.first_workflow_event_received,
-            'phase_transitions': self.stats['phase_transitions'],
+            'phase_transitions': self.stats.phase_transitions,
             'browser_ready_time': self.browser_ready_time,
-            'first_workflow_event_time': self.stats.get('first_workflow_event_time')
+            'first_workflow_event_time': self.stats.first_workflow_event_time
         }
 
     # Phase transition methods - explicit and robust
+    def _record_transition(self, milestone: str, timestamp: float,
+                           from_phase: Optional[str] = None, to_phase: Optional[str] = None) -> None:
+        """Record a phase change or readiness milestone in stats (bounded)"""
+        transitions = self.stats.phase_transitions
+        transitions.append({
+            'from_phase': from_phase,
+            'to_phase': to_phase,
+            'milestone': milestone,
+            'timestamp': timestamp
+        })
+        if len(transitions) > _MAX_PHASE_TRANSITIONS:
+            del transitions[0]
+    
     async def transition_to_ready(self) -> bool:
         """Transition from SETUP to READY phase (rrweb recording started)"""
         if self.current_phase == StreamingPhase.SETUP:
+            self._stats_snapshot = None
             self.current_phase = StreamingPhase.READY
             transition_time = time.time()
-            self.phase_transitions.append({
-                'from_phase': StreamingPhase.SETUP.value,
-                'to_phase': StreamingPhase.READY.value,
-                'timestamp': transition_time
-            })
-            self.stats['phase_transitions'].append({
-                'milestone': 'ready_phase',
-                'timestamp': transition_time
-            })
+            self._record_transition('ready_phase', transition_time, StreamingPhase.SETUP.value, StreamingPhase.READY.value)
             logger.info(f"🔄 Phase transition: SETUP → READY for session {self.session_id}")
             return True
         return False
@@ -742,25 +912,18 @@ class RRWebEventStreamer:
     async def transition_to_executing(self) -> bool:
         """Transition to EXECUTING phase (workflow execution started)"""
         if self.current_phase in [StreamingPhase.SETUP, StreamingPhase.READY]:
+            self._stats_snapshot = None
             # Capture original phase before changing it
             original_phase = self.current_phase
             self.current_phase = StreamingPhase.EXECUTING
             transition_time = time.time()
-            self.phase_transitions.append({
-                'from_phase': original_phase.value,  # Use original phase, not current
-                'to_phase': StreamingPhase.EXECUTING.value,
-                'timestamp': transition_time
-            })
-            self.stats['phase_transitions'].append({
-                'milestone': 'executing_phase',
-                'timestamp': transition_time
-            })
+            self._record_transition('executing_phase', transition_time, original_phase.value, StreamingPhase.EXECUTING.value)
             
             # Force browser ready status (for debugging)
             self.browser_ready = True
-            self.browser_ready_time = time.time()
-            self.stats['browser_ready'] = True
-            self.stats['browser_ready_time'] = self.browser_ready_time
+            self.browser_ready_time = transition_time
+            self.stats.browser_ready = True
+            self.stats.browser_ready_time = self.browser_ready_time
             logger.info(f"🔧 FORCED browser ready status for session {self.session_id}")
             
             logger.info(f"🔄 Phase transition: {original_phase.value} → EXECUTING for session {self.session_id}")
@@ -770,17 +933,10 @@ class RRWebEventStreamer:
     async def transition_to_completed(self) -> bool:
         """Transition to COMPLETED phase (workflow execution finished)"""
         if self.current_phase == StreamingPhase.EXECUTING:
+            self._stats_snapshot = None
             self.current_phase = StreamingPhase.COMPLETED
             transition_time = time.time()
-            self.phase_transitions.append({
-                'from_phase': StreamingPhase.EXECUTING.value,
-                'to_phase': StreamingPhase.COMPLETED.value,
-                'timestamp': transition_time
-            })
-            self.stats['phase_transitions'].append({
-                'milestone': 'completed_phase',
-                'timestamp': transition_time
-            })
+            self._record_transition('completed_phase', transition_time, StreamingPhase.EXECUTING.value, StreamingPhase.COMPLETED.value)
             logger.info(f"🔄 Phase transition: EXECUTING → COMPLETED for session {self.session_id}")
             return True
         return False
@@ -788,18 +944,11 @@ class RRWebEventStreamer:
     async def transition_to_cleanup(self) -> bool:
         """Transition to CLEANUP phase (browser cleanup started)"""
         if self.current_phase in [StreamingPhase.COMPLETED, StreamingPhase.EXECUTING]:
+            self._stats_snapshot = None
             original_phase = self.current_phase
             self.current_phase = StreamingPhase.CLEANUP
             transition_time = time.time()
-            self.phase_transitions.append({
-                'from_phase': original_phase.value,
-                'to_phase': StreamingPhase.CLEANUP.value,
-                'timestamp': transition_time
-            })
-            self.stats['phase_transitions'].append({
-                'milestone': 'cleanup_phase',
-                'timestamp': transition_time
-            })
+            self._record_transition('cleanup_phase', transition_time, original_phase.value, StreamingPhase.CLEANUP.value)
             
             # Don't immediately mark browser as not ready
             # The browser should stay "ready" until actual cleanup happens
@@ -816,6 +965,8 @@ class RRWebEventStreamer:
             
             # Clear all buffers
             self.event_buffer.clear()
+            self._broadcast_count = self._buffered_count
+            self._tail_coalescable = False
             
             # Mark browser as not ready
             await self.mark_browser_not_ready()
@@ -19,9 +19,10 @@ What it DOESN'T do:
 """
 
 import asyncio
+import heapq
 import logging
 import time
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # Import the event streamer class
 from .event_streamer import RRWebEventStreamer
@@ -42,6 +43,10 @@ class RRWebStreamersManager:
         self.streamers: Dict[str, RRWebEventStreamer] = {}
         self.cleanup_interval = 300  # 5 minutes
         self._cleanup_task_started = False
+        # Min-heap of (next check time, session_id). An entry is live only while
+        # it matches _next_check[session_id]; superseded entries are skipped on pop.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._next_check: Dict[str, float] = {}
         logger.info("RRWebStreamersManager initialized")
     
     def get_or_create_streamer(self, session_id: str) -> RRWebEventStreamer:
@@ -67,6 +72,8 @@ class RRWebStreamersManager:
         
         if session_id not in self.streamers:
             self.streamers[session_id] = RRWebEventStreamer(session_id)
+            # First check a full interval from now, giving clients time to connect
+            self._schedule_check(session_id, time.time() + self.cleanup_interval)
             logger.info(f"Created new streamer for session {session_id}")
         else:
             logger.debug(f"Returning existing streamer for session {session_id}")
@@ -107,8 +114,9 @@ class RRWebStreamersManager:
                 # Fallback to regular stop
                 await streamer.stop_streaming()
             
-            # Remove from manager
+            # Remove from manager (its heap entry is skipped once popped)
             del self.streamers[session_id]
+            self._next_check.pop(session_id, None)
             logger.info(f"Removed streamer for session {session_id}")
             return True
         else:
@@ -186,8 +194,38 @@ class RRWebStreamersManager:
         logger.info(f"Cleaned up {cleaned_count} of {len(session_ids)} sessions")
         return cleaned_count
     
+    def _schedule_check(self, session_id: str, check_time: float) -> None:
+        """(Re)schedule the inactivity check for a session"""
+        self._next_check[session_id] = check_time
+        heapq.heappush(self._expiry_heap, (check_time, session_id))
+    
+    def _next_check_for(self, streamer: RRWebEventStreamer, current_time: float) -> Optional[float]:
+        """When to look at a session again, or None if it should be cleaned up now"""
+        idle_time = current_time - streamer.stats.last_event_time
+        
+        # No connected clients and no recent activity
+        if len(streamer.connected_clients) == 0:
+            if idle_time > self.cleanup_interval:
+                return None
+            return streamer.stats.last_event_time + self.cleanup_interval
+        
+        # Streaming not active for extended period
+        if not streamer.streaming_active:
+            if idle_time > self.cleanup_interval * 2:
+                return None
+            return streamer.stats.last_event_time + self.cleanup_interval * 2
+        
+        # Active with clients: nothing expires until that changes
+        return current_time + self.cleanup_interval
+    
     async def _cleanup_inactive_sessions(self) -> None:
-        """Periodically cleanup inactive sessions"""
+        """Clean up inactive sessions as their inactivity checks come due.
+        
+        Sessions sit in a heap ordered by next check time, so each wake-up
+        only looks at sessions that may have expired instead of scanning all.
+        A session that turns out to be active is rescheduled from its latest
+        event time.
+        """
         logger.info("Starting background cleanup task")
         
         while True:
@@ -195,24 +233,22 @@ class RRWebStreamersManager:
                 current_time = time.time()
                 inactive_sessions = []
                 
-                for session_id, streamer in self.streamers.items():
-                    # Check if session should be cleaned up
-                    should_cleanup = False
-                    
-                    # No connected clients and no recent activity
-                    if (len(streamer.connected_clients) == 0 and 
-                        current_time - streamer.stats['last_event_time'] > self.cleanup_interval):
-                        should_cleanup = True
-                        logger.debug(f"Session {session_id} marked for cleanup: no clients and no recent activity")
-                    
-                    # Streaming not active for extended period
-                    elif (not streamer.streaming_active and 
-                          current_time - streamer.stats.get('last_event_time', 0) > self.cleanup_interval * 2):
-                        should_cleanup = True
-                        logger.debug(f"Session {session_id} marked for cleanup: streaming inactive")
+                heap = self._expiry_heap
+                while heap and heap[0][0] <= current_time:
+                    check_time, session_id = heapq.heappop(heap)
+                    if self._next_check.get(session_id) != check_time:
+                        continue  # Superseded or session already removed
                     
-                    if should_cleanup:
-                        inactive_sessions.append(session_id)
+                    streamer = self.streamers.get(session_id)
+                    next_check = self._next_check_for(streamer, current_time) if streamer else None
+                    if next_check is None:
+                        del self._next_check[session_id]
+                        if streamer:
+                            logger.debug(f"Session {session_id} marked for cleanup: inactive")
+                            inactive_sessions.append(session_id)
+                    else:
+                        # Never reschedule into the past, or the loop would spin
+                        self._schedule_check(session_id, max(next_check, current_time + 1))
                 
                 # Cleanup inactive sessions
                 cleaned_count = 0
@@ -227,8 +263,12 @@ class RRWebStreamersManager:
                 if cleaned_count > 0:
                     logger.info(f"Cleaned up {cleaned_count} inactive sessions")
                 
-                # Wait before next cleanup cycle
-                await asyncio.sleep(self.cleanup_interval)
+                # Sleep until the next check is due; new sessions are scheduled
+                # a full interval out, so they never need an earlier wake-up
+                delay = self.cleanup_interval
+                if heap:
+                    delay = min(delay, max(heap[0][0] - time.time(), 1))
+                await asyncio.sleep(delay)
                 
             except Exception as e:
                 logger.error(f"Error in cleanup task: {e}")
@@ -58,6 +58,9 @@ background_tasks: Dict[str, Dict[str, Any]] = {}
 
 logger = logging.getLogger(__name__)
 
+# Plain uvicorn/logging lines are noise in the per-task log stream
+_FILTERED_LOG_PREFIXES = (b'INFO:', b'WARNING:', b'DEBUG:', b'ERROR:')
+
 class WorkflowService:
 	"""Workflow execution service."""
 
@@ -340,28 +343,32 @@ class WorkflowService:
 			return 0
 		return log_file.stat().st_size
 
-	async def _read_logs_from_position(self, position: int) -> Tuple[List[str], int]:
+	async def _read_log_bytes_from_position(self, position: int) -> Tuple[bytes, int]:
+		"""Raw UTF-8 log lines written since `position`, minus plain level-prefixed lines."""
 		log_file = self.log_dir / 'backend.log'
 		if not log_file.exists():
-			return [], 0
+			return b'', 0
 
 		current_size = log_file.stat().st_size
 		if position >= current_size:
-			return [], position
+			return b'', position
 
-		with open(log_file, 'r', encoding='utf-8') as f:
+		with open(log_file, 'rb') as f:
 			f.seek(position)
-			all_logs = f.readlines()
-			new_logs = [
-				line
-				for line in all_logs
-				if not line.strip().startswith('INFO:')
-				and not line.strip().startswith('WARNING:')
-				and not line.strip().startswith('DEBUG:')
-				and not line.strip().startswith('ERROR:')
-			]
+			# Stop at the size we report back so lines appended meanwhile are
+			# picked up by the next poll instead of being returned twice
+			chunk = f.read(current_size - position)
+		new_logs = b''.join(
+			line
+			for line in chunk.splitlines(keepends=True)
+			if not line.lstrip().startswith(_FILTERED_LOG_PREFIXES)
+		)
 		return new_logs, current_size
 
+	async def _read_logs_from_position(self, position: int) -> Tuple[List[str], int]:
+		new_logs, current_size = await self._read_log_bytes_from_position(position)
+		return new_logs.decode('utf-8', 'replace').splitlines(keepends=True), current_size
+
 	async def _write_log(self, log_file: Path, message: str) -> None:
 		"""Write a message to the log file."""
 		async with aiofiles.open(log_file, 'a') as f:
@@ -673,6 +680,13 @@ class WorkflowService:
 		from backend.execution_history_service import get_execution_history_service
 		execution_service = get_execution_history_service(self.supabase)
 		
+		# Prefetch the owner's storage_state now so the DB query + decrypt overlap with
+		# workflow loading and streaming setup instead of delaying browser launch.
+		# Only the visual streaming path below uses it.
+		storage_state_prefetch = None
+		if visual_streaming and session_id and owner_id and os.getenv('FEATURE_USE_COOKIES', 'true').lower() == 'true':
+			storage_state_prefetch = asyncio.create_task(asyncio.to_thread(self._get_storage_state_for_user, owner_id))
+		
 		# 🔧 CRITICAL FIX: Create visual streaming session IMMEDIATELY to avoid "Session not found" errors
 		if visual_streaming and session_id:
 			try:
@@ -808,8 +822,8 @@ class WorkflowService:
 					
 					# 0. Try latest verified DB record for this owner (guarded by FEATURE_USE_COOKIES)
 					try:
-						if os.getenv('FEATURE_USE_COOKIES', 'true').lower() == 'true':
-							storage_state_data = self._get_storage_state_for_user(owner_id)
+						if storage_state_prefetch:
+							storage_state_data = await storage_state_prefetch
 						if storage_state_data:
 							storage_state_source = 'database'
 							# Log detailed info about loaded state
@@ -1108,6 +1122,11 @@ class WorkflowService:
 				except Exception as update_error:
 					await self._write_warning_log(log_file, f'Failed to update execution record with error: {update_error}')
 		finally:
+			# Drop the storage_state prefetch if the run ended before it was used
+			# (cancel() is a no-op once it has finished)
+			if storage_state_prefetch:
+				storage_state_prefetch.cancel()
+
 			# Reset execution_id contextvar
 			try:
 				if 'ctx_token' in locals() and ctx_token is not None:
@@ -1664,6 +1683,18 @@ async def process_workflow_upload_async(job_id: str, recording_data: dict, user_
 		recording_id = None
 		
 		if transcript_data:
+			# Correlation and the recording save below are wasted on a recording
+			# the conversion step would reject, so check its shape first
+			try:
+				from workflow_use.schema.views import WorkflowDefinitionSchema
+				WorkflowDefinitionSchema.model_validate(recording_data)
+			except Exception as e:
+				workflow_jobs[job_id].status = "failed"
+				workflow_jobs[job_id].error = f"Workflow conversion failed: {str(e)}"
+				workflow_jobs[job_id].estimated_remaining_seconds = 0
+				logger.warning(f"Recording for job {job_id} failed schema validation: {e}")
+				return None
+			
 			try:
 				logger.info(f"🔗 Correlating transcript with recording for job {job_id} (BEFORE LLM)")
 				from workflow_use.analyzer.transcript_correlator import correlate_transcript_with_workflow
@@ -12,16 +12,195 @@ Sources (in priority order):
 """
 
 import os
-import json
-import base64
 import logging
 import asyncio
 import time
+import hashlib
+import functools
+import weakref
+from binascii import a2b_base64, b2a_base64
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+import orjson  # Parses bytes directly, no intermediate str
+
+try:
+    import pybase64  # SIMD (AVX2/NEON) base64 codecs, optional
+except ImportError:
+    pybase64 = None
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached (user_id, site_filter) database loads
+_DB_CACHE_MAX_ENTRIES = 1024
+
+# Upper bound on cached AES-GCM handles for RSA-unwrapped data keys
+_AESGCM_CACHE_MAX_ENTRIES = 256
+
+# cookie_uploads inserts arriving within this window are sent as one request
+_INSERT_BATCH_WINDOW_SECONDS = 0.05
+_INSERT_BATCH_MAX_ROWS = 32
+
+_CookieRules = Tuple[Tuple[Tuple[str, ...], Tuple[str, ...]], ...]
+
+# Cookie verification rules: key -> alternatives, any of which may pass. Each alternative is
+# (names, domains): every name must be set on one of the domains. A domain starting with '.'
+# matches that suffix (d.endswith('.google.com')), otherwise it must match exactly.
+_COOKIE_RULES: Dict[str, _CookieRules] = {
+    # Per-site login checks (metadata.sites)
+    "google": ((("SID", "SIDCC"), (".google.com", "google.com")),),
+    "linkedin": ((("li_at",), (".linkedin.com", ".www.linkedin.com")),),
+    "instagram": ((("sessionid",), (".instagram.com", "instagram.com")),),
+    "facebook": ((("c_user", "xs"), (".facebook.com", "facebook.com")),),
+    "tiktok": (
+        (("sessionid",), (".tiktok.com", ".www.tiktok.com")),
+        (("sid_tt",), (".tiktok.com",)),
+    ),
+    # Granular Google checks
+    "google_apex": ((("SID", "SIDCC"), (".google.com",)),),
+    "google_accounts": ((("__Host-GAPS",), ("accounts.google.com",)),),
+    "google_docs": ((("OSID",), (".docs.google.com",)),),
+}
+
+# Checked by _verify_cookies when no sites are specified
+_DEFAULT_SITE_KEYS = ("google", "linkedin", "instagram", "facebook", "tiktok")
+_GOOGLE_COMPLETENESS_KEYS = ("google_apex", "google_accounts", "google_docs")
+
+# Every exact domain / dotted suffix any rule looks up, so indexing skips irrelevant ones like '.com'
+_RULE_DOMAINS = frozenset(
+    domain
+    for rules in _COOKIE_RULES.values()
+    for _, domains in rules
+    for domain in domains
+)
+
+# Every cookie name any rule requires; other cookies are skipped before their domain is examined
+_RULE_NAMES = frozenset(
+    name
+    for rules in _COOKIE_RULES.values()
+    for names, _ in rules
+    for name in names
+)
+
+
+def _env_cache_ttl_seconds() -> float:
+    """How long a decrypted database load stays fresh (STORAGE_STATE_CACHE_TTL_SECONDS, 0 disables)"""
+    try:
+        v = os.getenv("STORAGE_STATE_CACHE_TTL_SECONDS")
+        return float(v) if v else 30.0
+    except Exception:
+        return 30.0
+
+
+def _env_db_soft_deadline_seconds() -> Optional[float]:
+    """
+    Seconds to wait for the database before serving an existing per-user file instead
+    (STORAGE_STATE_DB_SOFT_DEADLINE_SECONDS). Unset means always wait for the database.
+    """
+    try:
+        v = os.getenv("STORAGE_STATE_DB_SOFT_DEADLINE_SECONDS")
+        return float(v) if v else None
+    except Exception:
+        return None
+
+
+def _index_cookies_by_domain(cookies: List[Dict]) -> Dict[str, Set[str]]:
+    """
+    Map each cookie domain, and every dotted suffix of it, to the cookie names set there.
+    
+    'accounts.google.com' is indexed under 'accounts.google.com' and '.google.com' (and '.com',
+    were any rule to use it), so both an exact-domain check and an endswith('.google.com') check
+    are one dict lookup. Only cookies named in _RULE_NAMES and domains in _RULE_DOMAINS are kept.
+    """
+    index: Dict[str, Set[str]] = {}
+    for c in cookies:
+        name = c.get('name')
+        if name not in _RULE_NAMES:
+            continue
+        domain = str(c.get('domain', '')).lower()
+        if domain in _RULE_DOMAINS:
+            index.setdefault(domain, set()).add(name)
+        dot = domain.find('.')
+        while dot != -1:
+            suffix = domain[dot:]
+            if suffix in _RULE_DOMAINS:
+                index.setdefault(suffix, set()).add(name)
+            dot = domain.find('.', dot + 1)
+    return index
+
+
+def _rules_satisfied(index: Dict[str, Set[str]], rules: _CookieRules) -> bool:
+    """Evaluate one site's rule alternatives against an index from _index_cookies_by_domain"""
+    return any(
+        all(any(name in index.get(d, ()) for d in domains) for name in names)
+        for names, domains in rules
+    )
+
+
+def _b64encode(data: bytes) -> str:
+    """Base64-encode to str in one C call (no base64-module wrapper, no trailing newline)"""
+    if pybase64:
+        return pybase64.b64encode_as_string(data)
+    return b2a_base64(data, newline=False).decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    """Base64-decode, ignoring non-alphabet characters like binascii.a2b_base64"""
+    if pybase64:
+        return pybase64.b64decode(data, validate=False)
+    return a2b_base64(data)
+
+
+def _read_json_file(path: Path) -> Optional[Dict[str, Any]]:
+    """Read a JSON file, None if it doesn't exist (blocking, run via asyncio.to_thread)"""
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _write_json_file(path: Path, state: Dict[str, Any]) -> None:
+    """Write state as indented JSON, creating parent dirs (blocking, run via asyncio.to_thread)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+
+
+# Configuration below is read once per process; call .cache_clear() after changing the environment
+
+@functools.lru_cache(maxsize=1)
+def _feature_use_cookies() -> bool:
+    """FEATURE_USE_COOKIES flag (default true)"""
+    return os.getenv('FEATURE_USE_COOKIES', 'true').lower() == 'true'
+
+
+@functools.lru_cache(maxsize=1)
+def _private_key():
+    """Parsed private key from COOKIE_PRIVATE_KEY_PEM or COOKIE_PRIVATE_KEY_PATH, None if not configured"""
+    from cryptography.hazmat.primitives import serialization
+    
+    priv_pem = os.getenv("COOKIE_PRIVATE_KEY_PEM")
+    priv_path = os.getenv("COOKIE_PRIVATE_KEY_PATH")
+    
+    if not priv_pem and priv_path and os.path.exists(priv_path):
+        with open(priv_path, 'r') as f:
+            priv_pem = f.read()
+    
+    if not priv_pem:
+        return None
+    return serialization.load_pem_private_key(priv_pem.encode("utf-8"), password=None)
+
+
+@functools.lru_cache(maxsize=1)
+def _public_key():
+    """Parsed public key from COOKIE_PUBLIC_KEY_PEM, None if not configured"""
+    from cryptography.hazmat.primitives import serialization
+    
+    public_key_pem = os.getenv("COOKIE_PUBLIC_KEY_PEM")
+    if not public_key_pem:
+        return None
+    return serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
+
 
 class StorageStateManager:
     """
@@ -39,8 +218,20 @@ class StorageStateManager:
         self.base_profile_dir = Path.home() / ".browseruse" / "profiles"
         self.base_profile_dir.mkdir(parents=True, exist_ok=True)
         
-        # Locks for thread-safe saving per user
-        self._save_locks: Dict[str, asyncio.Lock] = {}
+        # Locks for thread-safe saving per user; an entry lives only while a save holds its lock
+        self._save_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        
+        # Decrypted database loads keyed by (user_id, site_filter) -> (loaded_at, result)
+        self._db_cache: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Database loads currently running, so concurrent callers share one query
+        self._inflight: Dict[Tuple[str, Optional[str]], asyncio.Task] = {}
+        # AES-GCM handles for unwrapped data keys keyed by sha256(wrapped_key_b64), skips the
+        # RSA-OAEP decrypt and cipher setup on repeat loads
+        self._aesgcm_cache: "OrderedDict[bytes, Any]" = OrderedDict()
+        
+        # cookie_uploads rows waiting for the next batched insert, each with the saver's future
+        self._pending_inserts: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._insert_flush_task: Optional[asyncio.Task] = None
         
         logger.info("StorageStateManager initialized")
     
@@ -79,11 +270,37 @@ class StorageStateManager:
             logger.info(f"Forcing source: {force_source}")
             return await self._load_from_source(force_source, user_id, site_filter)
         
+        user_file = self.base_profile_dir / user_id / 'storage_state.json' if user_id else None
+        user_file_task = None
+        
         # Priority 1: Database (requires user_id + FEATURE_USE_COOKIES)
-        if user_id and os.getenv('FEATURE_USE_COOKIES', 'true').lower() == 'true':
+        if user_id and _feature_use_cookies():
+            deadline = _env_db_soft_deadline_seconds()
+            if deadline and self._cached_db_load((user_id, site_filter), _env_cache_ttl_seconds()) is None:
+                # Probe the per-user file concurrently so it is ready if the database is slow
+                user_file_task = asyncio.create_task(asyncio.to_thread(_read_json_file, user_file))
+            db_task = asyncio.create_task(self._load_from_database(user_id, site_filter))
             try:
-                result = await self._load_from_database(user_id, site_filter)
+                if deadline:
+                    await asyncio.wait({db_task}, timeout=deadline)
+                    if not db_task.done():
+                        # Hedge: serve the local file if it exists; the DB load keeps running to warm the cache
+                        state = await self._user_file_state(user_file_task)
+                        if state is not None:
+                            db_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                            logger.info(f"✅ Loaded storage_state from USER_FILE for {user_id} (database exceeded {deadline}s)")
+                            return {
+                                "state": state,
+                                "source": "user_file",
+                                "user_id": user_id,
+                                "path": str(user_file)
+                            }
+                result = await db_task
                 if result:
+                    if user_file_task:
+                        # Retrieve a failed read's exception so asyncio doesn't log it
+                        user_file_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                        user_file_task.cancel()
                     logger.info(f"✅ Loaded storage_state from DATABASE for user {user_id}")
                     return {
                         "state": result['state'],
@@ -97,12 +314,13 @@ class StorageStateManager:
                 sources_attempted.append("database")
         
         # Priority 2: Per-user local file
-        if user_id:
+        if user_file:
             try:
-                user_file = self.base_profile_dir / user_id / 'storage_state.json'
-                if user_file.exists():
-                    with open(user_file, 'r') as f:
-                        state = json.load(f)
+                if user_file_task:
+                    state = await user_file_task
+                else:
+                    state = await asyncio.to_thread(_read_json_file, user_file)
+                if state is not None:
                     logger.info(f"✅ Loaded storage_state from USER_FILE for {user_id}")
                     return {
                         "state": state,
@@ -118,7 +336,7 @@ class StorageStateManager:
         try:
             b64 = os.getenv('STORAGE_STATE_JSON_B64')
             if b64:
-                state = json.loads(base64.b64decode(b64).decode('utf-8'))
+                state = orjson.loads(_b64decode(b64))
                 logger.info("✅ Loaded storage_state from ENVIRONMENT variable")
                 logger.warning("⚠️  Environment variable storage state is shared across all users!")
                 return {
@@ -133,9 +351,8 @@ class StorageStateManager:
         # Priority 4: Repository root file (dev fallback)
         try:
             root_file = Path('storage_state.json')
-            if root_file.exists():
-                with open(root_file, 'r') as f:
-                    state = json.load(f)
+            state = await asyncio.to_thread(_read_json_file, root_file)
+            if state is not None:
                 logger.info("✅ Loaded storage_state from ROOT file (dev fallback)")
                 logger.warning("⚠️  Root file storage state is shared across all users!")
                 return {
@@ -154,6 +371,16 @@ class StorageStateManager:
         )
         return None
     
+    @staticmethod
+    async def _user_file_state(user_file_task: Optional[asyncio.Task]) -> Optional[Dict[str, Any]]:
+        """Result of the concurrent user-file probe, None if absent or unreadable"""
+        if not user_file_task:
+            return None
+        try:
+            return await asyncio.shield(user_file_task)
+        except Exception:
+            return None
+    
     async def _load_from_source(
         self,
         source: str,
@@ -165,24 +392,85 @@ class StorageStateManager:
             return await self._load_from_database(user_id, site_filter)
         elif source == 'user_file' and user_id:
             user_file = self.base_profile_dir / user_id / 'storage_state.json'
-            if user_file.exists():
-                with open(user_file, 'r') as f:
-                    return {"state": json.load(f), "source": "user_file"}
+            state = await asyncio.to_thread(_read_json_file, user_file)
+            if state is not None:
+                return {"state": state, "source": "user_file"}
         elif source == 'env':
             b64 = os.getenv('STORAGE_STATE_JSON_B64')
             if b64:
-                return {"state": json.loads(base64.b64decode(b64).decode('utf-8')), "source": "environment"}
+                return {"state": orjson.loads(_b64decode(b64)), "source": "environment"}
         elif source == 'root_file':
             root_file = Path('storage_state.json')
-            if root_file.exists():
-                with open(root_file, 'r') as f:
-                    return {"state": json.load(f), "source": "root_file"}
+            state = await asyncio.to_thread(_read_json_file, root_file)
+            if state is not None:
+                return {"state": state, "source": "root_file"}
         return None
     
     async def _load_from_database(
         self,
         user_id: str,
         site_filter: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load latest verified storage state, served from the in-process cache when fresh.
+        
+        Concurrent callers for the same (user_id, site_filter) share a single
+        database query. The returned state is shared with the cache and should
+        be treated as read-only.
+        """
+        key = (user_id, site_filter)
+        ttl = _env_cache_ttl_seconds()
+        
+        cached = self._cached_db_load(key, ttl)
+        if cached is not None:
+            logger.debug(f"Storage state cache hit for user {user_id}")
+            return cached
+        
+        # The query runs in its own task so a cancelled caller doesn't cancel it for the others
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.create_task(self._fetch_and_cache(key, ttl))
+            self._inflight[key] = inflight
+        return await asyncio.shield(inflight)
+    
+    def _cached_db_load(self, key: Tuple[str, Optional[str]], ttl: float) -> Optional[Dict[str, Any]]:
+        """Cached database load for key if still fresh, else None"""
+        cached = self._db_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            self._db_cache.move_to_end(key)
+            return cached[1]
+        return None
+    
+    async def _fetch_and_cache(self, key: Tuple[str, Optional[str]], ttl: float) -> Optional[Dict[str, Any]]:
+        """Run the shared database query for key and cache a hit"""
+        task = asyncio.current_task()
+        try:
+            result = await self._fetch_from_database(*key)
+        finally:
+            invalidated = self._inflight.get(key) is not task
+            if not invalidated:
+                self._inflight.pop(key)
+        
+        # Don't cache misses or loads that raced with a save for this user
+        if result and ttl > 0 and not invalidated:
+            self._db_cache[key] = (time.monotonic(), result)
+            self._db_cache.move_to_end(key)
+            while len(self._db_cache) > _DB_CACHE_MAX_ENTRIES:
+                self._db_cache.popitem(last=False)
+        
+        return result
+    
+    def invalidate_cache(self, user_id: str) -> None:
+        """Drop cached and in-flight database loads for a user (all site filters)"""
+        for key in [k for k in self._db_cache if k[0] == user_id]:
+            del self._db_cache[key]
+        for key in [k for k in self._inflight if k[0] == user_id]:
+            del self._inflight[key]
+    
+    async def _fetch_from_database(
+        self,
+        user_id: str,
+        site_filter: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Load latest verified storage state from Supabase database.
@@ -210,7 +498,7 @@ class StorageStateManager:
                 # Supabase jsonb filtering
                 query = query.contains("metadata", {"sites": [site_filter]})
             
-            result = query.execute()
+            result = await asyncio.to_thread(query.execute)
             
             if not result.data or len(result.data) == 0:
                 logger.debug(f"No verified storage state found in DB for user {user_id}")
@@ -255,48 +543,57 @@ class StorageStateManager:
         Reuses decryption logic from storage_state_api.py
         """
         try:
-            from cryptography.hazmat.primitives import serialization, hashes
-            from cryptography.hazmat.primitives.asymmetric import padding
-            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-            
-            # Get private key
-            priv_pem = os.getenv("COOKIE_PRIVATE_KEY_PEM")
-            priv_path = os.getenv("COOKIE_PRIVATE_KEY_PATH")
-            
-            if not priv_pem and priv_path and os.path.exists(priv_path):
-                with open(priv_path, 'r') as f:
-                    priv_pem = f.read()
-            
-            if not priv_pem:
-                logger.error("Private key not configured for decryption")
+            aesgcm = self._get_aesgcm(wrapped_key_b64)
+            if not aesgcm:
                 return None
             
-            # Decode base64
-            private_key = serialization.load_pem_private_key(priv_pem.encode("utf-8"), password=None)
-            wrapped_key = base64.b64decode(wrapped_key_b64)
-            data_key = private_key.decrypt(
-                wrapped_key,
-                padding.OAEP(
-                    mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                    algorithm=hashes.SHA256(),
-                    label=None
-                )
-            )
-            
-            nonce = base64.b64decode(nonce_b64)
-            ciphertext = base64.b64decode(ciphertext_b64)
+            nonce = _b64decode(nonce_b64)
+            ciphertext = _b64decode(ciphertext_b64)
             
             # Decrypt with AES-GCM
-            aesgcm = AESGCM(data_key)
             plaintext = aesgcm.decrypt(nonce, ciphertext, associated_data=None)
             
-            state = json.loads(plaintext.decode("utf-8"))
+            state = orjson.loads(plaintext)
             return state
             
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             return None
     
+    def _get_aesgcm(self, wrapped_key_b64: str):
+        """Return an AES-GCM handle for a wrapped data key, using the RSA private key only on a cache miss"""
+        cache_key = hashlib.sha256(wrapped_key_b64.encode("ascii")).digest()
+        aesgcm = self._aesgcm_cache.get(cache_key)
+        if aesgcm:
+            self._aesgcm_cache.move_to_end(cache_key)
+            return aesgcm
+        
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        
+        private_key = _private_key()
+        if not private_key:
+            logger.error("Private key not configured for decryption")
+            return None
+        
+        # Decode base64
+        wrapped_key = _b64decode(wrapped_key_b64)
+        data_key = private_key.decrypt(
+            wrapped_key,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+        
+        aesgcm = AESGCM(data_key)
+        self._aesgcm_cache[cache_key] = aesgcm
+        while len(self._aesgcm_cache) > _AESGCM_CACHE_MAX_ENTRIES:
+            self._aesgcm_cache.popitem(last=False)
+        return aesgcm
+    
     # ===================================================================
     # SAVING: Auto-save with strategy selection
     # ===================================================================
@@ -323,12 +620,14 @@ class StorageStateManager:
             Dict with 'target', 'record_id'/'path', 'encrypted'
         """
         # Thread-safe saving per user
-        if user_id not in self._save_locks:
-            self._save_locks[user_id] = asyncio.Lock()
+        lock = self._save_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._save_locks[user_id] = lock
         
-        async with self._save_locks[user_id]:
+        async with lock:
             # Primary target: Database (production)
-            if os.getenv('FEATURE_USE_COOKIES', 'true').lower() == 'true':
+            if _feature_use_cookies():
                 try:
                     result = await self._save_to_database(user_id, state, metadata or {})
                     if result:
@@ -345,10 +644,7 @@ class StorageStateManager:
             # Fallback target: Per-user local file (development)
             try:
                 user_file = self.base_profile_dir / user_id / 'storage_state.json'
-                user_file.parent.mkdir(parents=True, exist_ok=True)
-                
-                with open(user_file, 'w') as f:
-                    json.dump(state, f, indent=2)
+                await asyncio.to_thread(_write_json_file, user_file, state)
                 
                 logger.info(f"✅ Saved storage_state to USER_FILE: {user_file}")
                 return {
@@ -373,11 +669,10 @@ class StorageStateManager:
         """
         try:
             from .dependencies import supabase
-            from cryptography.hazmat.primitives import serialization, hashes
+            from cryptography.hazmat.primitives import hashes
             from cryptography.hazmat.primitives.asymmetric import padding
             from cryptography.hazmat.primitives.ciphers.aead import AESGCM
             import secrets
-            import hashlib
             import uuid
             
             if not supabase:
@@ -385,8 +680,8 @@ class StorageStateManager:
                 return None
             
             # Get public key for encryption
-            public_key_pem = os.getenv("COOKIE_PUBLIC_KEY_PEM")
-            if not public_key_pem:
+            public_key = _public_key()
+            if not public_key:
                 logger.error("Public key not configured for encryption")
                 return None
             
@@ -395,13 +690,12 @@ class StorageStateManager:
             data_key = secrets.token_bytes(32)  # 256-bit AES key
             
             # 2. Encrypt data with AES-GCM
-            plaintext = json.dumps(state).encode('utf-8')
+            plaintext = orjson.dumps(state)  # bytes straight from the encoder, no intermediate str
             nonce = secrets.token_bytes(12)  # 96-bit nonce for GCM
             aesgcm = AESGCM(data_key)
             ciphertext = aesgcm.encrypt(nonce, plaintext, associated_data=None)
             
             # 3. Wrap AES key with RSA public key
-            public_key = serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
             wrapped_key = public_key.encrypt(
                 data_key,
                 padding.OAEP(
@@ -415,6 +709,8 @@ class StorageStateManager:
             record_id = f"st_{uuid.uuid4().hex[:8]}"
             kid = os.getenv("COOKIE_KID", "rsa-2025-01")
             
+            # Same checksum field as storage_state_api uploads, which clients read from metadata.
+            # hashlib is OpenSSL-backed (SHA-NI where available), so SHA-256 stays.
             size_bytes = len(ciphertext)
             sha256 = hashlib.sha256(ciphertext).hexdigest()
             
@@ -429,15 +725,16 @@ class StorageStateManager:
                 "id": record_id,
                 "user_id": user_id,
                 "kid": kid,
-                "ciphertext": base64.b64encode(ciphertext).decode("ascii"),
-                "wrapped_key": base64.b64encode(wrapped_key).decode("ascii"),
-                "nonce": base64.b64encode(nonce).decode("ascii"),
+                "ciphertext": _b64encode(ciphertext),
+                "wrapped_key": _b64encode(wrapped_key),
+                "nonce": _b64encode(nonce),
                 "metadata": {**metadata, "size_bytes": size_bytes, "sha256": sha256},
                 "verified": verified_map,
                 "status": new_status,
             }
             
-            supabase.table("cookie_uploads").insert(row).execute()
+            await self._insert_cookie_upload(row)
+            self.invalidate_cache(user_id)
             
             logger.info(f"Saved encrypted storage state to DB: {record_id} (status: {new_status})")
             
@@ -451,61 +748,72 @@ class StorageStateManager:
             logger.error(f"Database save error: {e}")
             return None
     
+    async def _insert_cookie_upload(self, row: Dict[str, Any]) -> None:
+        """Queue a cookie_uploads row and wait until the batched insert containing it completes"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_inserts.append((row, future))
+        if self._insert_flush_task is None:
+            self._insert_flush_task = asyncio.create_task(self._flush_inserts())
+        await future
+    
+    async def _flush_inserts(self) -> None:
+        """Send queued rows after a short window, coalescing concurrent saves into one request"""
+        try:
+            await asyncio.sleep(_INSERT_BATCH_WINDOW_SECONDS)
+            while self._pending_inserts:
+                batch = self._pending_inserts[:_INSERT_BATCH_MAX_ROWS]
+                del self._pending_inserts[:_INSERT_BATCH_MAX_ROWS]
+                await self._execute_insert_batch(batch)
+        finally:
+            self._insert_flush_task = None
+    
+    async def _execute_insert_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Insert a batch of rows; if the batch is rejected, retry row by row so one bad row fails alone"""
+        from .dependencies import supabase
+        
+        def insert(rows):
+            return supabase.table("cookie_uploads").insert(rows).execute()
+        
+        try:
+            await asyncio.to_thread(insert, [row for row, _ in batch])
+            outcomes = [None] * len(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                outcomes = [e]
+            else:
+                logger.warning(f"Batched insert of {len(batch)} storage states failed, retrying individually: {e}")
+                outcomes = []
+                for row, _ in batch:
+                    try:
+                        await asyncio.to_thread(insert, row)
+                        outcomes.append(None)
+                    except Exception as row_error:
+                        outcomes.append(row_error)
+        
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if outcome is None:
+                future.set_result(None)
+            else:
+                future.set_exception(outcome)
+    
     def _verify_cookies(self, cookies: List[Dict], sites: List[str]) -> Dict[str, bool]:
         """
-        Verify critical cookies are present for specified sites.
+        Verify critical cookies are present for the given rule keys (sites or granular checks).
         
         Reuses verification logic from storage_state_api.py
         """
-        def has_cookie(domain_pred, name):
-            return any(
-                c.get('name') == name and domain_pred(str(c.get('domain', '')).lower())
-                for c in cookies
-            )
-        
-        checks = {
-            "google": lambda: has_cookie(
-                lambda d: d.endswith('.google.com') or d == 'google.com',
-                'SID'
-            ) and has_cookie(
-                lambda d: d.endswith('.google.com') or d == 'google.com',
-                'SIDCC'
-            ),
-            "linkedin": lambda: has_cookie(
-                lambda d: d.endswith('.linkedin.com') or d.endswith('.www.linkedin.com'),
-                'li_at'
-            ),
-            "instagram": lambda: has_cookie(
-                lambda d: d.endswith('.instagram.com') or d == 'instagram.com',
-                'sessionid'
-            ),
-            "facebook": lambda: has_cookie(
-                lambda d: d.endswith('.facebook.com') or d == 'facebook.com',
-                'c_user'
-            ) and has_cookie(
-                lambda d: d.endswith('.facebook.com') or d == 'facebook.com',
-                'xs'
-            ),
-            "tiktok": lambda: has_cookie(
-                lambda d: d.endswith('.tiktok.com') or d.endswith('.www.tiktok.com'),
-                'sessionid'
-            ) or has_cookie(
-                lambda d: d.endswith('.tiktok.com'),
-                'sid_tt'
-            ),
-        }
+        index = _index_cookies_by_domain(cookies)
         
         # If no sites specified, check all
-        targets = sites if sites else list(checks.keys())
+        targets = sites if sites else _DEFAULT_SITE_KEYS
         
         verified_map = {}
         for key in targets:
-            fn = checks.get(key)
-            if fn:
-                try:
-                    verified_map[key] = bool(fn())
-                except Exception:
-                    verified_map[key] = False
+            rules = _COOKIE_RULES.get(key)
+            if rules:
+                verified_map[key] = _rules_satisfied(index, rules)
         
         return verified_map
     
@@ -517,49 +825,17 @@ class StorageStateManager:
         """Remove already-expired cookies"""
         now = time.time()
         
-        valid_cookies = []
-        expired_count = 0
-        
-        for cookie in cookies:
-            expires = cookie.get('expires', -1)
-            if expires == -1 or expires > now:
-                valid_cookies.append(cookie)
-            else:
-                expired_count += 1
+        valid_cookies = [c for c in cookies if (expires := c.get('expires', -1)) == -1 or expires > now]
         
+        expired_count = len(cookies) - len(valid_cookies)
         if expired_count > 0:
-            logger.info(f"Filtered out {expired_count} expired cookies")
+            logger.info("Filtered out %d expired cookies", expired_count)
         
         return valid_cookies
     
     def validate_google_cookie_completeness(self, cookies: List[Dict]) -> Dict[str, bool]:
         """Check if critical Google cookies are present"""
-        
-        def has_cookie(domain_check, name):
-            return any(
-                c['name'] == name and domain_check(c.get('domain', ''))
-                for c in cookies
-            )
-        
-        checks = {
-            'google_apex': has_cookie(
-                lambda d: d.endswith('.google.com'),
-                'SID'
-            ) and has_cookie(
-                lambda d: d.endswith('.google.com'),
-                'SIDCC'
-            ),
-            'google_accounts': has_cookie(
-                lambda d: d == 'accounts.google.com',
-                '__Host-GAPS'
-            ),
-            'google_docs': has_cookie(
-                lambda d: d.endswith('.docs.google.com'),
-                'OSID'
-            )
-        }
-        
-        return checks
+        return self._verify_cookies(cookies, list(_GOOGLE_COMPLETENESS_KEYS))
 
 
 # Global instance for easy access
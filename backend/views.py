@@ -1,14 +1,57 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict
+import orjson
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from workflow_use.schema.views import WorkflowDefinitionSchema
 
+# Response models are built once per request and never mutated afterwards.
+# TaskInfo and WorkflowJobStatus are updated in place by the service, so they
+# keep the default (mutable) config.
+_RESPONSE_CONFIG = ConfigDict(extra='ignore', frozen=True)
+# Models only reached by the execution-history/stats endpoints or not bound to
+# any route build their validators on first use instead of at import.
+_DEFERRED_RESPONSE_CONFIG = ConfigDict(_RESPONSE_CONFIG, defer_build=True)
+
+# Closed value sets for fields the API accepts or the service sets itself.
+# Values read back from the database (execution history) stay plain str.
+TaskStatus = Literal['running', 'cancelling', 'completed', 'failed', 'cancelled']
+JobStatus = Literal['processing', 'completed', 'failed']
+ExecutionStatus = Literal['running', 'completed', 'failed', 'cancelled']
+ExecMode = Literal['cloud-run', 'local-run', 'auto']
+SessionExecMode = Literal['cloud-run', 'local-run']
+VisualQuality = Literal['low', 'standard', 'high']
+
+# Execution results are rows of {"step_id": int, "content": str}, but rows
+# stored by older clients may carry other keys. Plain dicts also validate
+# about 4x faster than a per-row model in pydantic-core, so keep them untyped.
+StepResults = List[Dict[str, Any]]
+
+
+class _JSONCachedModel(BaseModel):
+	"""Mutable status model that keeps its last JSON rendering until a field is reassigned.
+
+	Status objects are polled far more often than they change, and the service
+	only ever replaces their fields wholesale, so invalidating on assignment is
+	enough.
+	"""
+	_json_cache: Optional[bytes] = PrivateAttr(default=None)
+
+	def __setattr__(self, name: str, value: Any) -> None:
+		super().__setattr__(name, value)
+		if name in type(self).model_fields:
+			self._json_cache = None
+
+	def _cached_json(self, render: Callable[[], Any]) -> bytes:
+		if self._json_cache is None:
+			self._json_cache = orjson.dumps(render(), default=str)
+		return self._json_cache
+
 
 # Task Models
-class TaskInfo(BaseModel):
+class TaskInfo(_JSONCachedModel):
 	model_config = ConfigDict(extra='ignore')
-	status: str
+	status: TaskStatus
 	workflow: str
 	result: Optional[Any] = None
 	error: Optional[str] = None
@@ -16,6 +59,16 @@ class TaskInfo(BaseModel):
 	visual_stream_url: Optional[str] = None  # rrweb streaming endpoint
 	viewer_url: Optional[str] = None  # rrweb viewer page
 
+	def status_json(self, task_id: str) -> bytes:
+		"""WorkflowStatusResponse body for this task, re-rendered only after a change."""
+		return self._cached_json(lambda: {
+			'task_id': task_id,
+			'status': self.status,
+			'workflow': self.workflow,
+			'result': self.result,
+			'error': self.error,
+		})
+
 
 # Request Models
 class WorkflowUpdateRequest(BaseModel):
@@ -33,16 +86,16 @@ class WorkflowMetadataUpdateRequest(BaseModel):
 class VisualWorkflowRequest(BaseModel):
 	name: str
 	inputs: dict
-	mode: str = "auto"  # "cloud-run", "local-run", or "auto"
+	mode: ExecMode = "auto"
 	visual_streaming: bool = True  # Enable rrweb visual streaming
-	visual_quality: str = "standard"  # "low", "standard", "high"
+	visual_quality: VisualQuality = "standard"
 	visual_events_buffer: int = 1000  # Number of events to buffer
 
 
 class WorkflowExecuteRequest(BaseModel):
 	name: str
 	inputs: dict
-	mode: str = "auto"  # "cloud-run", "local-run", or "auto"
+	mode: ExecMode = "auto"
 	visual: bool = False  # Legacy visual feedback (deprecated)
 
 
@@ -63,16 +116,19 @@ class WorkflowBuildRequest(BaseModel):
 
 # Response Models
 class WorkflowResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	error: Optional[str] = None
 
 
 class WorkflowListResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	workflows: List[str]
 
 
 # ENHANCED: Visual streaming support in workflow execution response
 class VisualWorkflowResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	task_id: str
 	session_id: str  # Visual streaming session ID
@@ -91,6 +147,7 @@ class VisualWorkflowResponse(BaseModel):
 
 
 class WorkflowExecuteResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	task_id: str
 	message: str
@@ -98,34 +155,21 @@ class WorkflowExecuteResponse(BaseModel):
 
 
 class WorkflowLogsResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	task_id: str
 	logs: List[str]
 	position: int
 
 
 class WorkflowRecordResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	workflow: Optional[WorkflowDefinitionSchema] = None
 	error: Optional[str] = None
 
 
-# ENHANCED: Visual streaming support in status response
-class VisualWorkflowStatusResponse(BaseModel):
-	"""Enhanced workflow status with visual streaming information"""
-	task_id: str
-	status: str
-	workflow: str
-	result: Optional[List[Dict[str, Any]]] = None
-	error: Optional[str] = None
-	# rrweb visual streaming fields
-	visual_streaming_enabled: bool = False  # Whether rrweb streaming is active
-	visual_stream_url: Optional[str] = None  # WebSocket URL for rrweb events
-	viewer_url: Optional[str] = None  # HTML viewer URL for rrweb playback
-	visual_events_count: Optional[int] = None  # Number of events captured
-	visual_last_event_time: Optional[str] = None  # Timestamp of last event
-
-
 class WorkflowStatusResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	task_id: str
 	status: str
 	workflow: str
@@ -134,11 +178,13 @@ class WorkflowStatusResponse(BaseModel):
 
 
 class WorkflowCancelResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	message: str
 
 
 class WorkflowBuildResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	message: str
 	error: Optional[str] = None
@@ -147,11 +193,13 @@ class WorkflowBuildResponse(BaseModel):
 # NEW: Visual streaming specific models
 class VisualStreamingStatusRequest(BaseModel):
 	"""Request model for visual streaming status"""
+	model_config = ConfigDict(defer_build=True)
 	session_id: str
 
 
 class VisualStreamingStatusResponse(BaseModel):
 	"""Response model for visual streaming status"""
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	session_id: str
 	streaming_active: bool
@@ -167,31 +215,52 @@ class VisualStreamingStatusResponse(BaseModel):
 	error: Optional[str] = None
 
 
+class RRWebEventPayload(BaseModel):
+	"""A raw rrweb event as recorded in the browser"""
+	model_config = ConfigDict(_DEFERRED_RESPONSE_CONFIG, extra='allow')
+	type: int  # rrweb EventType (2 = FullSnapshot, 3 = IncrementalSnapshot, 4 = Meta, ...)
+	data: Dict[str, Any] = {}
+	timestamp: Union[int, float]  # milliseconds, as emitted by rrweb
+
+
 class VisualStreamingEventResponse(BaseModel):
 	"""Response model for individual rrweb events (FIXED FORMAT)"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	session_id: str
 	timestamp: float
-	event: Dict[str, Any]  # FIXED: rrweb event object (was event_data)
+	event: RRWebEventPayload  # FIXED: rrweb event object (was event_data)
 	sequence_id: int = 0
 	metadata: Optional[Dict[str, Any]] = None
 	# REMOVED: event_type (redundant with event.type)
 
 
+class VisualStreamingEventBatchResponse(BaseModel):
+	"""WebSocket frame packing several rrweb events, sent to clients that sent {'type': 'enable_batching'}"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
+	type: str = "rrweb_batch"
+	session_id: str
+	events: List[VisualStreamingEventResponse]  # In sequence order
+
+
 # New models for async processing
 class WorkflowUploadResponse(BaseModel):
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	job_id: str
 	message: str
 	estimated_duration_seconds: int = 30
 
-class WorkflowJobStatus(BaseModel):
+class WorkflowJobStatus(_JSONCachedModel):
 	job_id: str
-	status: str  # "processing", "completed", "failed"
+	status: JobStatus
 	progress: int  # 0-100
 	workflow_id: Optional[str] = None  # UUID when completed
 	error: Optional[str] = None
 	estimated_remaining_seconds: Optional[int] = None
 
+	def json_bytes(self) -> bytes:
+		return self._cached_json(self.model_dump)
+
 class UploadRequest(BaseModel):
 	recording: dict
 	goal: str
@@ -199,6 +268,7 @@ class UploadRequest(BaseModel):
 	transcript: Optional[dict] = None  # Voice transcript data with timestamps
 
 class OwnershipResponse(BaseModel):
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	is_owner: bool
 	owner_id: Optional[str]
 	is_legacy: bool
@@ -207,13 +277,14 @@ class SessionUploadRequest(BaseModel):
 	recording: dict
 	goal: str
 	name: Optional[str] = None
-	session_token: str  # Supabase session access token
+	session_token: Optional[str] = None  # Supabase session access token
 	transcript: Optional[dict] = None  # Voice transcript data with timestamps
 
 # Session-based request models for database operations
+# session_token may be omitted when sent as an `Authorization: Bearer` header
 class SessionWorkflowUpdateRequest(BaseModel):
 	workflow_data: dict  # The workflow JSON data to update
-	session_token: str
+	session_token: Optional[str] = None
 
 class SessionWorkflowMetadataUpdateRequest(BaseModel):
 	name: Optional[str] = None
@@ -221,42 +292,36 @@ class SessionWorkflowMetadataUpdateRequest(BaseModel):
 	workflow_analysis: Optional[str] = None
 	version: Optional[str] = None
 	input_schema: Optional[List[dict]] = None
-	session_token: str
+	session_token: Optional[str] = None
 
 class SessionWorkflowDeleteStepRequest(BaseModel):
 	step_index: int  # Index of the step to delete
-	session_token: str
+	session_token: Optional[str] = None
 
 # ENHANCED: Session-based workflow execution with visual streaming
 class SessionVisualWorkflowExecuteRequest(BaseModel):
 	"""Enhanced session-based workflow execution with visual streaming"""
 	inputs: Dict[str, Any]  # Input parameters for workflow execution
-	session_token: str
-	mode: str = "cloud-run"  # "cloud-run" or "local-run"
+	session_token: Optional[str] = None
+	mode: SessionExecMode = "cloud-run"
 	visual: bool = False  # Enable DevTools visual feedback (legacy)
 	# NEW: rrweb visual streaming fields
 	visual_streaming: bool = False  # Enable rrweb visual streaming
-	visual_quality: str = "standard"  # "standard", "high", "low"
+	visual_quality: VisualQuality = "standard"
 	visual_events_buffer: int = 1000  # Maximum events to buffer
 
 
-class SessionWorkflowExecuteRequest(BaseModel):
-	"""Legacy session-based workflow execution for backward compatibility"""
-	inputs: Dict[str, Any]  # Input parameters for workflow execution
-	session_token: str
-	mode: str = "cloud-run"  # "cloud-run" or "local-run"
-	visual: bool = False  # Enable visual feedback (legacy)
-
 # NEW: Visual streaming session management models
 class VisualStreamingSessionInfo(BaseModel):
 	"""Information about a visual streaming session"""
+	model_config = _RESPONSE_CONFIG
 	session_id: str
 	streaming_active: bool
 	events_processed: int
 	events_buffered: int
 	connected_clients: int
-	created_at: float  # timestamp
-	last_event_time: Optional[float] = None
+	created_at: float  # unix seconds
+	last_event_time: Optional[float] = None  # unix seconds
 	workflow_name: Optional[str] = None
 	quality: str = "standard"
 	stream_url: Optional[str] = None
@@ -265,6 +330,7 @@ class VisualStreamingSessionInfo(BaseModel):
 
 class VisualStreamingSessionsResponse(BaseModel):
 	"""Response for listing all visual streaming sessions"""
+	model_config = _RESPONSE_CONFIG
 	success: bool
 	sessions: Dict[str, VisualStreamingSessionInfo]
 	total_sessions: int
@@ -276,6 +342,7 @@ class VisualStreamingSessionsResponse(BaseModel):
 # NEW: Workflow execution history models
 class WorkflowExecutionHistory(BaseModel):
 	"""Model for workflow execution history records"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	execution_id: str  # UUID for the execution
 	workflow_id: str  # UUID of the workflow that was executed
 	user_id: Optional[str] = None  # User who executed the workflow
@@ -284,12 +351,12 @@ class WorkflowExecutionHistory(BaseModel):
 	visual_enabled: bool = False  # Whether visual feedback was enabled
 	visual_streaming_enabled: bool = False  # Whether rrweb streaming was enabled
 	inputs: Dict[str, Any] = {}  # Input parameters used
-	result: Optional[List[Dict[str, Any]]] = None  # Execution result
+	result: Optional[StepResults] = None  # Execution result
 	error: Optional[str] = None  # Error message if failed
 	logs: Optional[List[str]] = None  # Execution logs
 	execution_time_seconds: Optional[float] = None  # Total execution time
-	created_at: float  # Timestamp when execution started
-	completed_at: Optional[float] = None  # Timestamp when execution finished
+	created_at: float  # Unix seconds when execution started
+	completed_at: Optional[float] = None  # Unix seconds when execution finished
 	session_id: Optional[str] = None  # Visual streaming session ID if applicable
 	# NEW: Visual streaming metrics
 	visual_events_captured: Optional[int] = None  # Number of rrweb events captured
@@ -299,6 +366,7 @@ class WorkflowExecutionHistory(BaseModel):
 
 class WorkflowExecutionHistoryResponse(BaseModel):
 	"""Response model for workflow execution history"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	success: bool
 	executions: List[WorkflowExecutionHistory]
 	total_executions: int
@@ -310,6 +378,7 @@ class WorkflowExecutionHistoryResponse(BaseModel):
 
 class WorkflowExecutionStatsResponse(BaseModel):
 	"""Response model for workflow execution statistics"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	success: bool
 	workflow_id: str
 	total_executions: int
@@ -325,13 +394,14 @@ class WorkflowExecutionStatsResponse(BaseModel):
 # ENHANCED: Visual streaming session with execution history
 class EnhancedVisualStreamingSessionInfo(BaseModel):
 	"""Enhanced visual streaming session with execution context"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	session_id: str
 	streaming_active: bool
 	events_processed: int
 	events_buffered: int
 	connected_clients: int
-	created_at: float  # timestamp
-	last_event_time: Optional[float] = None
+	created_at: float  # unix seconds
+	last_event_time: Optional[float] = None  # unix seconds
 	workflow_name: Optional[str] = None
 	workflow_id: Optional[str] = None  # NEW: Link to workflow
 	execution_id: Optional[str] = None  # NEW: Link to execution history
@@ -346,6 +416,7 @@ class EnhancedVisualStreamingSessionInfo(BaseModel):
 
 class EnhancedVisualStreamingSessionsResponse(BaseModel):
 	"""Enhanced response for listing all visual streaming sessions with execution context"""
+	model_config = _DEFERRED_RESPONSE_CONFIG
 	success: bool
 	sessions: Dict[str, EnhancedVisualStreamingSessionInfo]
 	total_sessions: int
@@ -362,20 +433,20 @@ class EnhancedVisualStreamingSessionsResponse(BaseModel):
 class CreateWorkflowExecutionRequest(BaseModel):
 	"""Request to create a new workflow execution record"""
 	workflow_id: str
-	session_token: str
+	session_token: Optional[str] = None
 	inputs: Dict[str, Any] = {}
-	mode: str = "cloud-run"
+	mode: ExecMode = "cloud-run"
 	visual_enabled: bool = False
 	visual_streaming_enabled: bool = False
-	visual_quality: str = "standard"
+	visual_quality: VisualQuality = "standard"
 
 
 class UpdateWorkflowExecutionRequest(BaseModel):
 	"""Request to update workflow execution status"""
 	execution_id: str
-	session_token: str
-	status: Optional[str] = None  # "running", "completed", "failed", "cancelled"
-	result: Optional[List[Dict[str, Any]]] = None
+	session_token: Optional[str] = None
+	status: Optional[ExecutionStatus] = None
+	result: Optional[StepResults] = None
 	error: Optional[str] = None
 	logs: Optional[List[str]] = None
 	execution_time_seconds: Optional[float] = None
@@ -387,17 +458,18 @@ class GetWorkflowExecutionHistoryRequest(BaseModel):
 	"""Request to get workflow execution history"""
 	workflow_id: Optional[str] = None  # Filter by specific workflow
 	user_id: Optional[str] = None  # Filter by specific user
-	session_token: str
+	session_token: Optional[str] = None
 	page: int = 1
 	page_size: int = 50
 	status_filter: Optional[str] = None  # Filter by execution status
 	mode_filter: Optional[str] = None  # Filter by execution mode
 	visual_streaming_only: bool = False  # Only show executions with visual streaming
+	include_logs: bool = True  # False omits logs/result; fetch them from /executions/{id}/logs
 
 
 # NEW: Terminate execution request model
 class TerminateExecutionRequest(BaseModel):
-    session_token: str
+    session_token: Optional[str] = None
     mode: str = "stop_then_kill"  # "stop_then_kill" | "force"
     timeout_ms: int = 5000
     reason: Optional[str] = None
@@ -6,12 +6,12 @@ for real-time rrweb event streaming and visual workflow feedback.
 """
 
 import asyncio
-import json
+import itertools
 import logging
 import time
-from typing import Dict, Set, Optional, Any, List
+from typing import Dict, Optional, Any, List
 from fastapi import WebSocket, WebSocketDisconnect
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import orjson
 
 from .visual_streaming import streaming_manager, RRWebEventStreamer
@@ -19,14 +19,15 @@ from .visual_streaming import streaming_manager, RRWebEventStreamer
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class WebSocketConnection:
     """Represents a WebSocket connection with metadata"""
     websocket: WebSocket
     session_id: str
     client_id: str
-    connected_at: float
-    last_ping: float = 0
+    connected_at: float  # Wall clock, reported to clients
+    # Monotonic clock at connect, for durations unaffected by clock changes
+    connected_monotonic: float = field(default_factory=time.monotonic)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
@@ -34,50 +35,75 @@ class WebSocketConnection:
             'client_id': self.client_id,
             'session_id': self.session_id,
             'connected_at': self.connected_at,
-            'last_ping': self.last_ping,
-            'connection_duration': time.time() - self.connected_at
+            'connection_duration': time.monotonic() - self.connected_monotonic
         }
 
 
 class VisualWebSocketManager:
-    """Enhanced WebSocket management for visual streaming"""
+    """Enhanced WebSocket management for visual streaming
+    
+    Expects to run on uvloop: uvicorn's default loop='auto' picks it up from
+    uvicorn[standard] (see requirements.txt), and its transports cut the
+    per-send overhead that dominates broadcast fan-out.
+    
+    Connection liveness is left to the server's protocol-level keepalive
+    (uvicorn ws_ping_interval/ws_ping_timeout, 20s each by default): a dead
+    peer surfaces as WebSocketDisconnect in the receive loop, which
+    disconnects the client here.
+    
+    Frames are compressed with permessage-deflate, which uvicorn negotiates
+    with the browser by default (ws_per_message_deflate=True); rrweb mutation
+    frames shrink several-fold. ASGI has no per-message switch, so small
+    control messages are compressed too, which costs little at their size.
+    """
     
     def __init__(self):
         # Connection tracking
         self.connections: Dict[str, WebSocketConnection] = {}  # client_id -> connection
-        self.session_connections: Dict[str, Set[str]] = {}  # session_id -> set of client_ids
+        # session_id -> {client_id: connection}, in connection order, so a broadcast
+        # reads its session's connections without a lookup per client
+        self.session_connections: Dict[str, Dict[str, WebSocketConnection]] = {}
         
-        # Health monitoring
-        self.ping_interval = 30  # seconds
-        self.connection_timeout = 60  # seconds
+        # Broadcasts fan out to at most this many clients per loop iteration
+        self.broadcast_batch_size = 50
         
-        # Statistics
+        # Running counters; live connection/session counts are read off the
+        # tracking dicts in get_all_stats
         self.stats = {
             'total_connections': 0,
-            'active_connections': 0,
-            'total_sessions': 0,
             'messages_sent': 0,
             'messages_failed': 0,
             'bytes_sent': 0
         }
         
-        # Background task tracking
-        self._background_tasks_started = False
+        self._loop_reported = False
+        
+        # Suffix for client ids; unique even for connects within the same millisecond
+        self._client_seq = itertools.count(1)
+        
+        # Clients whose broadcast send failed, disconnected by _cleanup_loop.
+        # Both are created on first use and recreated if the task has ended or
+        # belongs to another event loop (this manager is a module-level singleton)
+        self._cleanup_queue: Optional[asyncio.Queue] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+        
+        # Inbound message type -> handler(client_id, message)
+        self._message_handlers = {
+            'ping': self._on_ping,
+            'get_status': self._on_get_status,
+            'enable_batching': self._on_enable_batching,
+            'sequence_reset_request': self._on_sequence_reset_request,
+        }
     
     async def handle_client_connection(self, websocket: WebSocket, session_id: str) -> str:
         """Handle new client connection for visual streaming"""
-        # Start background tasks if not already started
-        if not self._background_tasks_started:
-            try:
-                asyncio.create_task(self._health_check_loop())
-                asyncio.create_task(self._stats_update_loop())
-                self._background_tasks_started = True
-            except RuntimeError:
-                # No event loop running, will start later
-                pass
+        if not self._loop_reported:
+            self._loop_reported = True
+            loop_type = type(asyncio.get_running_loop())
+            logger.info(f"Visual WebSocket manager running on {loop_type.__module__}.{loop_type.__name__}")
         
         # Generate unique client ID
-        client_id = f"{session_id}_{int(time.time() * 1000)}"
+        client_id = f"{session_id}_{next(self._client_seq)}"
         
         try:
             # Accept WebSocket connection
@@ -96,8 +122,8 @@ class VisualWebSocketManager:
             
             # Add to session tracking
             if session_id not in self.session_connections:
-                self.session_connections[session_id] = set()
-            self.session_connections[session_id].add(client_id)
+                self.session_connections[session_id] = {}
+            self.session_connections[session_id][client_id] = connection
             
             # Register with streaming manager
             streamer = streaming_manager.get_or_create_streamer(session_id)
@@ -106,8 +132,6 @@ class VisualWebSocketManager:
             
             # Update statistics
             self.stats['total_connections'] += 1
-            self.stats['active_connections'] = len(self.connections)
-            self.stats['total_sessions'] = len(self.session_connections)
             
             logger.info(f"Client {client_id} connected to session {session_id}")
             
@@ -127,19 +151,24 @@ class VisualWebSocketManager:
     
     async def handle_client_disconnection(self, client_id: str) -> bool:
         """Handle client disconnection"""
-        if client_id not in self.connections:
+        connection = self.connections.get(client_id)
+        if connection is None:
             return False
-        
+        return await self._disconnect(connection)
+    
+    async def _disconnect(self, connection: WebSocketConnection) -> bool:
+        """Unregister a connection the caller already holds"""
+        client_id = connection.client_id
         try:
-            connection = self.connections[client_id]
             session_id = connection.session_id
             
-            # Remove from connections
-            del self.connections[client_id]
+            # Remove from connections (False if another path got there first)
+            if self.connections.pop(client_id, None) is None:
+                return False
             
             # Remove from session tracking
             if session_id in self.session_connections:
-                self.session_connections[session_id].discard(client_id)
+                self.session_connections[session_id].pop(client_id, None)
                 
                 # If no more clients for this session, clean up
                 if not self.session_connections[session_id]:
@@ -150,10 +179,6 @@ class VisualWebSocketManager:
                     if streamer:
                         await streamer.remove_client(connection.websocket)
             
-            # Update statistics
-            self.stats['active_connections'] = len(self.connections)
-            self.stats['total_sessions'] = len(self.session_connections)
-            
             logger.info(f"Client {client_id} disconnected from session {session_id}")
             return True
             
@@ -166,43 +191,73 @@ class VisualWebSocketManager:
         if session_id not in self.session_connections:
             return 0
         
-        client_ids = list(self.session_connections[session_id])
-        successful_sends = 0
+        # Snapshot: failed sends disconnect clients while the broadcast is in flight
+        connections = tuple(self.session_connections[session_id].values())
+        if not connections:
+            return 0
         failed_clients = []
         
+        # Encoded once; every client's send references this same bytes object.
+        # (Not a memoryview: ASGI 'websocket.send' requires bytes.)
         message_bytes = orjson.dumps(message)
         
-        for client_id in client_ids:
-            if client_id in self.connections:
-                try:
-                    connection = self.connections[client_id]
-                    await connection.websocket.send_bytes(message_bytes)
-                    successful_sends += 1
-                    
-                    # Update statistics
-                    self.stats['messages_sent'] += 1
-                    self.stats['bytes_sent'] += len(message_bytes)
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to send message to client {client_id}: {e}")
-                    failed_clients.append(client_id)
-                    self.stats['messages_failed'] += 1
+        # Send to all clients concurrently so one slow client does not hold up the rest.
+        # Large sessions go out in batches, yielding to the loop in between so
+        # pings and new connections are not starved by the fan-out.
+        batch_size = self.broadcast_batch_size
+        for start in range(0, len(connections), batch_size):
+            if start:
+                await asyncio.sleep(0)
+            batch = connections[start:start + batch_size]
+            results = await asyncio.gather(
+                *(connection.websocket.send_bytes(message_bytes) for connection in batch),
+                return_exceptions=True
+            )
+            for connection, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to send message to client {connection.client_id}: {result}")
+                    failed_clients.append(connection.client_id)
+        
+        # Update statistics once per broadcast
+        successful_sends = len(connections) - len(failed_clients)
+        self.stats['messages_sent'] += successful_sends
+        self.stats['bytes_sent'] += successful_sends * len(message_bytes)
+        self.stats['messages_failed'] += len(failed_clients)
         
-        # Clean up failed connections
+        # Clean up failed connections off the broadcast path
         for client_id in failed_clients:
-            await self.handle_client_disconnection(client_id)
+            self._schedule_disconnection(client_id)
         
         return successful_sends
     
+    def _schedule_disconnection(self, client_id: str) -> None:
+        """Queue a client for disconnection by the background cleanup loop"""
+        loop = asyncio.get_running_loop()
+        task = self._cleanup_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._cleanup_queue = asyncio.Queue()
+            # Keep a strong reference: the loop only holds tasks weakly
+            self._cleanup_task = loop.create_task(self._cleanup_loop(self._cleanup_queue))
+        self._cleanup_queue.put_nowait(client_id)
+    
+    async def _cleanup_loop(self, queue: asyncio.Queue) -> None:
+        """Disconnect clients queued by failed broadcasts"""
+        while True:
+            client_id = await queue.get()
+            try:
+                # A client queued by several failed broadcasts is only removed once
+                await self.handle_client_disconnection(client_id)
+            except Exception:
+                logger.exception(f"Error disconnecting client {client_id}")
+    
     async def send_to_client(self, client_id: str, message: Dict[str, Any]) -> bool:
         """Send message to specific client"""
-        if client_id not in self.connections:
+        connection = self.connections.get(client_id)
+        if connection is None:
             return False
         
         try:
-            connection = self.connections[client_id]
             message_bytes = orjson.dumps(message)
-            
             await connection.websocket.send_bytes(message_bytes)
             
             # Update statistics
@@ -214,7 +269,7 @@ class VisualWebSocketManager:
         except Exception as e:
             logger.error(f"Failed to send message to client {client_id}: {e}")
             self.stats['messages_failed'] += 1
-            await self.handle_client_disconnection(client_id)
+            await self._disconnect(connection)
             return False
     
     async def _send_control_message(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
@@ -234,7 +289,7 @@ class VisualWebSocketManager:
                 # Wait for message from client
                 try:
                     data = await websocket.receive_text()
-                    message = json.loads(data)
+                    message = orjson.loads(data)
                     
                     # Handle different message types
                     await self._handle_client_message(client_id, message)
@@ -242,7 +297,7 @@ class VisualWebSocketManager:
                 except WebSocketDisconnect:
                     logger.info(f"Client {client_id} disconnected")
                     break
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.warning(f"Invalid JSON from client {client_id}")
                     continue
                 except Exception as e:
@@ -255,99 +310,72 @@ class VisualWebSocketManager:
     async def _handle_client_message(self, client_id: str, message: Dict[str, Any]) -> None:
         """Handle incoming message from client"""
         message_type = message.get('type')
-        
-        if message_type == 'ping':
-            # Update last ping time
-            if client_id in self.connections:
-                self.connections[client_id].last_ping = time.time()
-            
-            # Send pong response
-            await self.send_to_client(client_id, {
-                'type': 'pong',
-                'timestamp': time.time()
-            })
-        
-        elif message_type == 'get_status':
-            # Send status information
+        handler = self._message_handlers.get(message_type)
+        if handler is not None:
+            await handler(client_id, message)
+        else:
+            logger.warning(f"Unknown message type from client {client_id}: {message_type}")
+    
+    async def _on_ping(self, client_id: str, message: Dict[str, Any]) -> None:
+        """Application-level ping from the viewer (browsers cannot send
+        protocol pings); liveness itself is handled by the server keepalive"""
+        await self.send_to_client(client_id, {
+            'type': 'pong',
+            'timestamp': time.time()
+        })
+    
+    async def _on_get_status(self, client_id: str, message: Dict[str, Any]) -> None:
+        """Send status information"""
+        await self.send_to_client(client_id, {
+            'type': 'status',
+            'data': self.get_connection_status(client_id)
+        })
+    
+    async def _on_enable_batching(self, client_id: str, message: Dict[str, Any]) -> None:
+        """Opt this client into multi-event 'rrweb_batch' frames"""
+        if client_id in self.connections:
+            connection = self.connections[client_id]
+            streamer = streaming_manager.get_streamer(connection.session_id)
+            if streamer and hasattr(streamer, 'enable_batching_for_client'):
+                streamer.enable_batching_for_client(connection.websocket)
             await self.send_to_client(client_id, {
-                'type': 'status',
-                'data': self.get_connection_status(client_id)
+                'type': 'batching_enabled',
+                'session_id': connection.session_id
             })
+    
+    async def _on_sequence_reset_request(self, client_id: str, message: Dict[str, Any]) -> None:
+        """Per-client sequence reset with optional small history replay (serve from buffer, no recorder restart)"""
+        try:
+            history_window_seconds = float(message.get('history_window_seconds', 3.0))
+        except Exception:
+            history_window_seconds = 3.0
 
-        elif message_type == 'sequence_reset_request':
-            # Per-client sequence reset with optional small history replay (serve from buffer, no recorder restart)
-            try:
-                history_window_seconds = float(message.get('history_window_seconds', 3.0))
-            except Exception:
-                history_window_seconds = 3.0
-
-            if client_id in self.connections:
-                connection = self.connections[client_id]
-                session_id = connection.session_id
-                streamer = streaming_manager.get_streamer(session_id)
-                if streamer and hasattr(streamer, 'mark_sequence_reset_for_client'):
-                    try:
-                        streamer.mark_sequence_reset_for_client(connection.websocket, history_window_seconds=history_window_seconds)
-                    except Exception as e:
-                        logger.debug(f"Failed to mark sequence reset state: {e}")
+        if client_id in self.connections:
+            connection = self.connections[client_id]
+            session_id = connection.session_id
+            streamer = streaming_manager.get_streamer(session_id)
+            if streamer and hasattr(streamer, 'mark_sequence_reset_for_client'):
+                try:
+                    streamer.mark_sequence_reset_for_client(connection.websocket, history_window_seconds=history_window_seconds)
+                except Exception as e:
+                    logger.debug(f"Failed to mark sequence reset state: {e}")
 
-                # Serve the most recent buffered FullSnapshot directly to this client
-                sent = False
-                if streamer and hasattr(streamer, 'send_last_fullsnapshot_to_client'):
-                    try:
-                        sent = await streamer.send_last_fullsnapshot_to_client(connection.websocket, history_window_seconds=history_window_seconds)
-                    except Exception as e:
-                        logger.debug(f"send_last_fullsnapshot_to_client failed: {e}")
-                if not sent:
-                    logger.debug("No buffered FullSnapshot available to send")
+            # Serve the most recent buffered FullSnapshot directly to this client
+            sent = False
+            if streamer and hasattr(streamer, 'send_last_fullsnapshot_to_client'):
+                try:
+                    sent = await streamer.send_last_fullsnapshot_to_client(connection.websocket, history_window_seconds=history_window_seconds)
+                except Exception as e:
+                    logger.debug(f"send_last_fullsnapshot_to_client failed: {e}")
+            if not sent:
+                logger.debug("No buffered FullSnapshot available to send")
 
-                # Acknowledge to client
-                await self.send_to_client(client_id, {
-                    'type': 'sequence_reset_ack',
-                    'session_id': session_id,
-                    'history_window_seconds': history_window_seconds
-                })
-        
-        else:
-            logger.warning(f"Unknown message type from client {client_id}: {message_type}")
-    
-    async def _health_check_loop(self) -> None:
-        """Background health check for connections"""
-        while True:
-            try:
-                current_time = time.time()
-                stale_connections = []
-                
-                for client_id, connection in self.connections.items():
-                    # Check for stale connections
-                    if (connection.last_ping > 0 and 
-                        current_time - connection.last_ping > self.connection_timeout):
-                        stale_connections.append(client_id)
-                
-                # Clean up stale connections
-                for client_id in stale_connections:
-                    logger.info(f"Removing stale connection: {client_id}")
-                    await self.handle_client_disconnection(client_id)
-                
-                await asyncio.sleep(self.ping_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in health check loop: {e}")
-                await asyncio.sleep(10)
-    
-    async def _stats_update_loop(self) -> None:
-        """Background statistics update loop"""
-        while True:
-            try:
-                # Update real-time statistics
-                self.stats['active_connections'] = len(self.connections)
-                self.stats['total_sessions'] = len(self.session_connections)
-                
-                await asyncio.sleep(10)  # Update every 10 seconds
-                
-            except Exception as e:
-                logger.error(f"Error in stats update loop: {e}")
-                await asyncio.sleep(30)
+            # Acknowledge to client
+            await self.send_to_client(client_id, {
+                'type': 'sequence_reset_ack',
+                'session_id': session_id,
+                'history_window_seconds': history_window_seconds
+            })
     
     def get_connection_status(self, client_id: str) -> Dict[str, Any]:
         """Get status for specific connection"""
@@ -357,16 +385,18 @@ class VisualWebSocketManager:
         connection = self.connections[client_id]
         return connection.to_dict()
     
+    def get_session_client_count(self, session_id: str) -> int:
+        """Number of clients connected to a session (0 if none)"""
+        return len(self.session_connections.get(session_id, ()))
+    
     def get_session_status(self, session_id: str) -> Dict[str, Any]:
         """Get status for all connections in a session"""
         if session_id not in self.session_connections:
             return {'error': 'Session not found'}
         
-        client_ids = self.session_connections[session_id]
         connections = [
-            self.connections[client_id].to_dict()
-            for client_id in client_ids
-            if client_id in self.connections
+            connection.to_dict()
+            for connection in self.session_connections[session_id].values()
         ]
         
         return {
@@ -378,7 +408,11 @@ class VisualWebSocketManager:
     def get_all_stats(self) -> Dict[str, Any]:
         """Get comprehensive statistics"""
         return {
-            'websocket_stats': self.stats,
+            'websocket_stats': {
+                **self.stats,
+                'active_connections': len(self.connections),
+                'total_sessions': len(self.session_connections)
+            },
             'streaming_stats': streaming_manager.get_all_stats(),
             'active_sessions': list(self.session_connections.keys()),
             'connection_count_by_session': {
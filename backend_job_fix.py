@@ -1,4 +1,9 @@
 # Improved job processing with better error handling
+import logging
+
+logger = logging.getLogger(__name__)
+
+
 async def process_workflow_upload_async_improved(job_id: str, recording_data: dict, user_goal: str, workflow_name: Optional[str] = None, owner_id: Optional[str] = None):
     """Process workflow upload with improved error handling and progress tracking."""
     try:
@@ -24,7 +29,7 @@ async def process_workflow_upload_async_improved(job_id: str, recording_data: di
             workflow_jobs[job_id].status = "failed"
             workflow_jobs[job_id].error = f"Workflow conversion failed: {str(e)}"
             workflow_jobs[job_id].estimated_remaining_seconds = 0
-            print(f"Workflow conversion failed for job {job_id}: {e}")
+            logger.exception("Workflow conversion failed for job %s", job_id)
             return None
         
         # Step 2: Save to database with content sanitization
@@ -35,14 +40,14 @@ async def process_workflow_upload_async_improved(job_id: str, recording_data: di
             from datetime import datetime
             now = datetime.utcnow().isoformat()
             
-            # Sanitize content before database insertion
-            sanitized_steps = []
-            for step in built_workflow.steps:
-                step_dict = step.model_dump()
-                # Remove or sanitize problematic Unicode characters
-                if 'content' in step_dict and step_dict['content']:
-                    step_dict['content'] = sanitize_content(step_dict['content'])
-                sanitized_steps.append(step_dict)
+            # Sanitize content before database insertion (steps are dumped once
+            # and their 'content' fixed in place)
+            sanitized_steps = [step.model_dump() for step in built_workflow.steps]
+            for step_dict in sanitized_steps:
+                content = step_dict.get('content')
+                if content:
+                    # Remove or sanitize problematic Unicode characters
+                    step_dict['content'] = sanitize_content(content)
             
             row = supabase.table("workflows").insert({
                 "owner_id": owner_id,
@@ -69,7 +74,7 @@ async def process_workflow_upload_async_improved(job_id: str, recording_data: di
             workflow_jobs[job_id].status = "failed"
             workflow_jobs[job_id].error = f"Database save failed: {str(e)}"
             workflow_jobs[job_id].estimated_remaining_seconds = 0
-            print(f"Database save failed for job {job_id}: {e}")
+            logger.exception("Database save failed for job %s", job_id)
             return None
         
     except Exception as e:
@@ -77,7 +82,7 @@ async def process_workflow_upload_async_improved(job_id: str, recording_data: di
         workflow_jobs[job_id].status = "failed"
         workflow_jobs[job_id].error = f"Unexpected error: {str(e)}"
         workflow_jobs[job_id].estimated_remaining_seconds = 0
-        print(f"Unexpected error in job {job_id}: {e}")
+        logger.exception("Unexpected error in job %s", job_id)
         return None
 
 def sanitize_content(content: str) -> str:
@@ -85,15 +90,16 @@ def sanitize_content(content: str) -> str:
     if not content:
         return content
     
-    # Remove null bytes and other problematic characters
-    content = content.replace('\x00', '')  # Remove null bytes
-    content = content.replace('\u0000', '')  # Remove Unicode null
+    # Remove null bytes ('\u0000' is the same code point, so one pass covers both)
+    content = content.replace('\x00', '')
     
     # Limit length to prevent overly long content
     if len(content) > 10000:
         content = content[:10000] + "... (truncated)"
     
     # Escape or remove problematic Unicode sequences
+    if content.isascii():
+        return content  # Always valid UTF-8; skip the trial encode below
     try:
         # Test if content can be safely stored
         content.encode('utf-8')
@@ -6,6 +6,8 @@ import os
 import json
 import base64
 
+import orjson
+
 print("=" * 60)
 print("STORAGE STATE CHECK")
 print("=" * 60)
@@ -15,8 +17,8 @@ if "STORAGE_STATE_JSON_B64" in os.environ:
     print("✅ STORAGE_STATE_JSON_B64 environment variable found")
     
     try:
-        decoded = base64.b64decode(os.environ["STORAGE_STATE_JSON_B64"]).decode()
-        data = json.loads(decoded)
+        # orjson parses the decoded bytes directly, without an intermediate str
+        data = orjson.loads(base64.b64decode(os.environ["STORAGE_STATE_JSON_B64"]))
         
         cookies = data.get("cookies", [])
         print(f"\n📊 Total cookies: {len(cookies)}")
@@ -27,9 +29,11 @@ if "STORAGE_STATE_JSON_B64" in os.environ:
         
         # Check for critical cookies
         critical_cookies = ['SID', 'SIDCC', 'APISID', 'HSID', 'LSID', '__Host-GAPS']
+        # Index by name once; reversed so the first cookie with a name wins, as a scan would
+        cookies_by_name = {c.get('name'): c for c in reversed(google_cookies)}
         found = {}
         for name in critical_cookies:
-            cookie = next((c for c in google_cookies if c.get('name') == name), None)
+            cookie = cookies_by_name.get(name)
             if cookie:
                 found[name] = {
                     'domain': cookie.get('domain'),
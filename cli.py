@@ -1,23 +1,16 @@
 import asyncio
-import json
+import functools
 import os
 import subprocess
 import tempfile  # For temporary file handling
 import webbrowser
 from pathlib import Path
 
+import orjson
 import typer
-from browser_use import Browser
 
-# Assuming OPENAI_API_KEY is set in the environment
-from langchain_openai import ChatOpenAI
-from patchright.async_api import async_playwright as patchright_async_playwright
-
-from workflow_use.builder.service import BuilderService
-from workflow_use.controller.service import WorkflowController
-from workflow_use.mcp.service import get_mcp_server
-from workflow_use.recorder.service import RecordingService  # Added import
-from workflow_use.workflow.service import Workflow
+# LLM, browser and workflow modules are imported inside the commands that use
+# them, so --help and light commands don't pay for langchain/playwright imports
 
 # Placeholder for recorder functionality
 # from src.recorder.service import RecorderService
@@ -29,24 +22,76 @@ app = typer.Typer(
 	no_args_is_help=True,
 )
 
-# Default LLM instance to None
-llm_instance = None
-try:
-	llm_instance = ChatOpenAI(model='gpt-4o')
-	page_extraction_llm = ChatOpenAI(model='gpt-4o-mini')
-except Exception as e:
-	typer.secho(f'Error initializing LLM: {e}. Would you like to set your OPENAI_API_KEY?', fg=typer.colors.RED)
+
+def _ensure_openai_key() -> bool:
+	"""Prompts for OPENAI_API_KEY if it is not set. Returns True if a key is available."""
+	if os.getenv('OPENAI_API_KEY'):
+		return True
+	typer.secho('OPENAI_API_KEY is not set. Would you like to set it?', fg=typer.colors.RED)
 	set_openai_api_key = input('Set OPENAI_API_KEY? (y/n): ')
 	if set_openai_api_key.lower() == 'y':
 		os.environ['OPENAI_API_KEY'] = input('Enter your OPENAI_API_KEY: ')
-		llm_instance = ChatOpenAI(model='gpt-4o')
-		page_extraction_llm = ChatOpenAI(model='gpt-4o-mini')
+		return True
+	return False
+
+
+@functools.lru_cache(maxsize=None)
+def _get_llms():
+	"""Returns (llm_instance, page_extraction_llm), created on first use; (None, None) if unavailable."""
+	if not _ensure_openai_key():
+		return None, None
+	from langchain_openai import ChatOpenAI
+
+	try:
+		return ChatOpenAI(model='gpt-4o'), ChatOpenAI(model='gpt-4o-mini')
+	except Exception as e:
+		typer.secho(f'Error initializing LLM: {e}', fg=typer.colors.RED)
+		return None, None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_builder():
+	"""Returns the BuilderService, or None if no LLM is available."""
+	llm_instance, _ = _get_llms()
+	if not llm_instance:
+		return None
+	from workflow_use.builder.service import BuilderService
 
-builder_service = BuilderService(llm=llm_instance) if llm_instance else None
-# recorder_service = RecorderService() # Placeholder
-recording_service = (
-	RecordingService()
-)  # Assuming RecordingService does not need LLM, or handle its potential None state if it does.
+	return BuilderService(llm=llm_instance)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_recorder():
+	"""Returns the RecordingService (it does not need an LLM)."""
+	from workflow_use.recorder.service import RecordingService
+
+	return RecordingService()
+
+
+_LAZY_ATTRS = {
+	'llm_instance': lambda: _get_llms()[0],
+	'page_extraction_llm': lambda: _get_llms()[1],
+	'builder_service': _get_builder,
+	'recording_service': _get_recorder,
+}
+
+
+def __getattr__(name: str):
+	"""Builds the former module-level services on first access (PEP 562)."""
+	factory = _LAZY_ATTRS.get(name)
+	if factory is None:
+		raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+	value = globals()[name] = factory()
+	return value
+
+
+def _run(coro):
+	"""Runs a coroutine to completion, on uvloop when it is installed."""
+	try:
+		import uvloop
+	except ImportError:
+		return asyncio.run(coro)
+	return uvloop.run(coro)
 
 
 def get_default_save_dir() -> Path:
@@ -64,6 +109,7 @@ def _build_and_save_workflow_from_recording(
 	is_temp_recording: bool = False,  # To adjust messages if it's from a live recording
 ) -> Path | None:
 	"""Builds a workflow from a recording file, prompts for details, and saves it."""
+	builder_service = _get_builder()
 	if not builder_service:
 		typer.secho(
 			'BuilderService not initialized. Cannot build workflow.',
@@ -87,36 +133,7 @@ def _build_and_save_workflow_from_recording(
 	typer.echo(f'The final built workflow will be saved in: {typer.style(str(output_dir), fg=typer.colors.CYAN)}')
 	typer.echo()  # Add space
 
-	typer.echo(
-		f'Processing recording ({typer.style(str(recording_path.name), fg=typer.colors.MAGENTA)}) and building workflow...'
-	)
-	try:
-		workflow_definition = asyncio.run(
-			builder_service.build_workflow_from_path(
-				recording_path,
-				description,
-			)
-		)
-	except FileNotFoundError:
-		typer.secho(
-			f'Error: Recording file not found at {recording_path}. Please ensure it exists.',
-			fg=typer.colors.RED,
-		)
-		return None
-	except Exception as e:
-		typer.secho(f'Error building workflow: {e}', fg=typer.colors.RED)
-		return None
-
-	if not workflow_definition:
-		typer.secho(
-			f'Failed to build workflow definition from the {prompt_subject} recording.',
-			fg=typer.colors.RED,
-		)
-		return None
-
-	typer.secho('Workflow built successfully!', fg=typer.colors.GREEN, bold=True)
-	typer.echo()  # Add space
-
+	# Ask for the file name up front so no prompt blocks inside the event loop
 	file_stem = recording_path.stem
 	if is_temp_recording:
 		file_stem = file_stem.replace('temp_recording_', '') or 'recorded'
@@ -130,17 +147,49 @@ def _build_and_save_workflow_from_recording(
 	if not workflow_output_name.endswith('.json'):
 		workflow_output_name = f'{workflow_output_name}.json'
 	final_workflow_path = output_dir / workflow_output_name
+	typer.echo()  # Add space
 
-	try:
-		asyncio.run(builder_service.save_workflow_to_path(workflow_definition, final_workflow_path))
+	async def _build_and_save() -> Path | None:
+		# Build and save share one event loop (and the LLM client's connections)
+		try:
+			workflow_definition = await builder_service.build_workflow_from_path(
+				recording_path,
+				description,
+			)
+		except FileNotFoundError:
+			typer.secho(
+				f'Error: Recording file not found at {recording_path}. Please ensure it exists.',
+				fg=typer.colors.RED,
+			)
+			return None
+		except Exception as e:
+			typer.secho(f'Error building workflow: {e}', fg=typer.colors.RED)
+			return None
+
+		if not workflow_definition:
+			typer.secho(
+				f'Failed to build workflow definition from the {prompt_subject} recording.',
+				fg=typer.colors.RED,
+			)
+			return None
+
+		typer.secho('Workflow built successfully!', fg=typer.colors.GREEN, bold=True)
+
+		try:
+			await builder_service.save_workflow_to_path(workflow_definition, final_workflow_path)
+		except Exception as e:
+			typer.secho(f'Error saving workflow: {e}', fg=typer.colors.RED)
+			return None
 		typer.secho(
 			f'Final workflow definition saved to: {typer.style(str(final_workflow_path.resolve()), fg=typer.colors.BRIGHT_GREEN, bold=True)}',
 			fg=typer.colors.GREEN,  # Overall message color
 		)
 		return final_workflow_path
-	except Exception as e:
-		typer.secho(f'Error saving workflow: {e}', fg=typer.colors.RED)
-		return None
+
+	typer.echo(
+		f'Processing recording ({typer.style(str(recording_path.name), fg=typer.colors.MAGENTA)}) and building workflow...'
+	)
+	return _run(_build_and_save())
 
 
 @app.command(
@@ -152,6 +201,7 @@ def create_workflow():
 	Guides the user through recording browser actions, then uses the helper
 	to build and save the workflow definition.
 	"""
+	recording_service = _get_recorder()
 	if not recording_service:
 		# Adjusted RecordingService initialization check assuming it doesn't need LLM
 		typer.secho(
@@ -168,7 +218,7 @@ def create_workflow():
 
 	temp_recording_path = None
 	try:
-		captured_recording_model = asyncio.run(recording_service.capture_workflow())
+		captured_recording_model = _run(recording_service.capture_workflow())
 
 		if not captured_recording_model:
 			typer.secho(
@@ -180,18 +230,19 @@ def create_workflow():
 		typer.secho('Recording captured successfully!', fg=typer.colors.GREEN, bold=True)
 		typer.echo()  # Add space
 
+		try:
+			recording_data = captured_recording_model.model_dump(mode='json')
+		except AttributeError:
+			recording_data = captured_recording_model
 		with tempfile.NamedTemporaryFile(
-			mode='w',
+			mode='wb',
 			suffix='.json',
 			prefix='temp_recording_',
 			delete=False,
 			dir=default_tmp_dir,
-			encoding='utf-8',
 		) as tmp_file:
-			try:
-				tmp_file.write(captured_recording_model.model_dump_json(indent=2))
-			except AttributeError:
-				json.dump(captured_recording_model, tmp_file, indent=2)
+			# orjson encodes straight to bytes, skipping the intermediate str
+			tmp_file.write(orjson.dumps(recording_data, option=orjson.OPT_INDENT_2))
 			temp_recording_path = Path(tmp_file.name)
 
 		# Use the helper function to build and save
@@ -267,6 +318,7 @@ def run_as_tool_command(
 	"""
 	Run the workflow and automatically parse the required variables from the input/prompt that the user provides.
 	"""
+	llm_instance, page_extraction_llm = _get_llms()
 	if not llm_instance:
 		typer.secho(
 			'LLM not initialized. Please check your OpenAI API key. Cannot run as tool.',
@@ -279,6 +331,8 @@ def run_as_tool_command(
 	)
 	typer.echo()  # Add space
 
+	from workflow_use.workflow.service import Workflow
+
 	try:
 		# Pass llm_instance to ensure the workflow can use it if needed for as_tool() or run_with_prompt()
 		workflow_obj = Workflow.load_from_file(str(workflow_path), llm=llm_instance, page_extraction_llm=page_extraction_llm)
@@ -291,13 +345,13 @@ def run_as_tool_command(
 	typer.echo(typer.style(f'Running workflow as tool with prompt: "{prompt}"', bold=True))
 
 	try:
-		result = asyncio.run(workflow_obj.run_as_tool(prompt))
+		result = _run(workflow_obj.run_as_tool(prompt))
 		typer.secho('\nWorkflow execution completed!', fg=typer.colors.GREEN, bold=True)
 		typer.echo(typer.style('Result:', bold=True))
 		# Ensure result is JSON serializable for consistent output
 		try:
-			typer.echo(json.dumps(json.loads(result), indent=2))  # Assuming result from run_with_prompt is a JSON string
-		except (json.JSONDecodeError, TypeError):
+			typer.echo(orjson.dumps(orjson.loads(result), option=orjson.OPT_INDENT_2).decode())  # Assuming result from run_with_prompt is a JSON string
+		except (orjson.JSONDecodeError, TypeError):
 			typer.echo(result)  # Fallback to string if not a JSON string or not serializable
 	except Exception as e:
 		typer.secho(f'Error running workflow as tool: {e}', fg=typer.colors.RED)
@@ -319,6 +373,13 @@ def run_workflow_command(
 	"""
 	Loads and executes a workflow, prompting the user for required inputs.
 	"""
+	from browser_use import Browser
+	from patchright.async_api import async_playwright as patchright_async_playwright
+
+	from workflow_use.controller.service import WorkflowController
+	from workflow_use.workflow.service import Workflow
+
+	llm_instance, page_extraction_llm = _get_llms()
 
 	async def _run_workflow():
 		typer.echo(
@@ -354,20 +415,17 @@ def run_workflow_command(
 			typer.echo(typer.style('Provide values for the following workflow inputs:', bold=True))
 			typer.echo()  # Add space
 
+			# Styled fragments that are the same for every input
+			prompt_prefix = typer.style('Enter value for ', bold=True)
+			required_str = typer.style('required', fg=typer.colors.RED)
+			optional_str = typer.style('optional', fg=typer.colors.YELLOW)
+
 			for input_def in input_definitions:
 				var_name_styled = typer.style(input_def.name, fg=typer.colors.CYAN, bold=True)
-				prompt_question = typer.style(f'Enter value for {var_name_styled}', bold=True)
-
 				var_type = input_def.type.lower()  # type is a direct attribute
-				is_required = input_def.required
-
-				type_info_str = f'type: {var_type}'
-				if is_required:
-					status_str = typer.style('required', fg=typer.colors.RED)
-				else:
-					status_str = typer.style('optional', fg=typer.colors.YELLOW)
+				status_str = required_str if input_def.required else optional_str
 
-				full_prompt_text = f'{prompt_question} ({status_str}, {type_info_str})'
+				full_prompt_text = f'{prompt_prefix}{var_name_styled} ({status_str}, type: {var_type})'
 
 				input_val = None
 				if var_type == 'bool':
@@ -408,7 +466,7 @@ def run_workflow_command(
 			typer.secho(f'Error running workflow: {e}', fg=typer.colors.RED)
 			raise typer.Exit(code=1)
 
-	return asyncio.run(_run_workflow())
+	return _run(_run_workflow())
 
 
 @app.command(name='mcp-server', help='Starts the MCP server which expose all the created workflows as tools.')
@@ -426,8 +484,12 @@ def mcp_server_command(
 	typer.echo(typer.style('Starting MCP server...', bold=True))
 	typer.echo()  # Add space
 
-	llm_instance = ChatOpenAI(model='gpt-4o')
-	page_extraction_llm = ChatOpenAI(model='gpt-4o-mini')
+	from workflow_use.mcp.service import get_mcp_server
+
+	llm_instance, page_extraction_llm = _get_llms()
+	if not llm_instance:
+		typer.secho('LLM not initialized. Please check your OpenAI API key.', fg=typer.colors.RED)
+		raise typer.Exit(code=1)
 
 	mcp = get_mcp_server(llm_instance, page_extraction_llm=page_extraction_llm, workflow_dir='./tmp')
 
@@ -445,22 +507,37 @@ def launch_gui():
 
 	logs_dir = Path('./tmp/logs')
 	logs_dir.mkdir(parents=True, exist_ok=True)
-	backend_log = open(logs_dir / 'backend.log', 'w')
-	frontend_log = open(logs_dir / 'frontend.log', 'w')
-
-	backend = subprocess.Popen(['uvicorn', 'backend.api:app'], stdout=backend_log, stderr=subprocess.STDOUT)
-	typer.echo(typer.style('Starting frontend...', bold=True))
-	frontend = subprocess.Popen(['npm', 'run', 'dev'], cwd='../wf-ui', stdout=frontend_log, stderr=subprocess.STDOUT)
-	typer.echo(typer.style('Opening browser...', bold=True))
-	webbrowser.open('http://localhost:5173')
-	try:
-		typer.echo(typer.style('Press Ctrl+C to stop the GUI and servers.', fg=typer.colors.YELLOW, bold=True))
-		backend.wait()
-		frontend.wait()
-	except KeyboardInterrupt:
-		typer.echo(typer.style('\nShutting down servers...', fg=typer.colors.RED, bold=True))
-		backend.terminate()
-		frontend.terminate()
+	# The children write straight to these files, so the parent needs no buffer
+	with (
+		open(logs_dir / 'backend.log', 'wb', buffering=0) as backend_log,
+		open(logs_dir / 'frontend.log', 'wb', buffering=0) as frontend_log,
+	):
+		processes = []
+		try:
+			processes.append(
+				subprocess.Popen(
+					['uvicorn', 'backend.api:app'], stdin=subprocess.DEVNULL, stdout=backend_log, stderr=subprocess.STDOUT
+				)
+			)
+			typer.echo(typer.style('Starting frontend...', bold=True))
+			processes.append(
+				subprocess.Popen(
+					['npm', 'run', 'dev'], cwd='../wf-ui', stdin=subprocess.DEVNULL, stdout=frontend_log, stderr=subprocess.STDOUT
+				)
+			)
+			typer.echo(typer.style('Opening browser...', bold=True))
+			webbrowser.open('http://localhost:5173')
+			typer.echo(typer.style('Press Ctrl+C to stop the GUI and servers.', fg=typer.colors.YELLOW, bold=True))
+			for process in processes:
+				process.wait()
+		except KeyboardInterrupt:
+			typer.echo(typer.style('\nShutting down servers...', fg=typer.colors.RED, bold=True))
+		finally:
+			# Reap whatever was started before the log files are closed
+			for process in processes:
+				process.terminate()
+			for process in processes:
+				process.wait()
 
 
 if __name__ == '__main__':
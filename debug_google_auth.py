@@ -4,10 +4,11 @@ Debug Google Authentication Issues
 Checks cookie state before and after navigation to identify why Google treats browser as signed-out
 """
 import os
-import json
 import base64
 import asyncio
 import time
+from collections import defaultdict
+import orjson
 from workflow_use.browser.browser_factory import BrowserFactory
 from playwright.async_api import Page
 
@@ -18,13 +19,13 @@ async def debug_google_auth():
     storage_state_data = None
     if "STORAGE_STATE_JSON_B64" in os.environ:
         try:
-            storage_state_data = json.loads(base64.b64decode(os.environ["STORAGE_STATE_JSON_B64"]).decode())
+            storage_state_data = orjson.loads(base64.b64decode(os.environ["STORAGE_STATE_JSON_B64"]))
         except Exception as e:
             print(f"Error decoding STORAGE_STATE_JSON_B64: {e}")
     elif os.path.exists("storage_state.json"):
         try:
-            with open("storage_state.json", "r") as f:
-                storage_state_data = json.load(f)
+            with open("storage_state.json", "rb") as f:
+                storage_state_data = orjson.loads(f.read())
         except Exception as e:
             print(f"Error loading storage_state.json: {e}")
     
@@ -43,53 +44,50 @@ async def debug_google_auth():
         storage_state=storage_state_data
     )
     page = await browser.get_current_page()
+    # One CDP session for the whole run; it stays attached across navigations
+    cdp = await page.context.new_cdp_session(page)
     
     # Function to get all cookies via CDP
     async def get_all_cookies():
-        cdp = await page.context.new_cdp_session(page)
-        cookies = (await cdp.send("Network.getAllCookies"))["cookies"]
-        await cdp.detach()
-        return cookies
+        return (await cdp.send("Network.getAllCookies"))["cookies"]
     
     # Function to analyze cookies by domain
     def analyze_cookies(cookies, domain_filter=None):
         current_time = time.time()
+        expires_soon_cutoff = current_time + 300  # 5 minutes
         result = {}
         
         for cookie in cookies:
             domain = cookie.get("domain", "")
-            name = cookie.get("name", "")
+            if domain_filter and domain_filter not in domain:
+                continue
+            
             value = cookie.get("value", "")
             expires = cookie.get("expires", 0)
-            secure = cookie.get("secure", False)
-            httpOnly = cookie.get("httpOnly", False)
-            sameSite = cookie.get("sameSite", "None")
             
-            if domain_filter and domain_filter not in domain:
-                continue
-                
             if domain not in result:
                 result[domain] = []
             
             # Check if cookie is expired or about to expire
-            is_expired = expires > 0 and expires <= current_time
-            expires_soon = expires > 0 and expires <= (current_time + 300)  # 5 minutes
-            
             result[domain].append({
-                "name": name,
+                "name": cookie.get("name", ""),
                 "value_length": len(value),
                 "has_value": bool(value),
                 "expires": expires,
-                "expires_human": time.ctime(expires) if expires > 0 else "Session",
-                "is_expired": is_expired,
-                "expires_soon": expires_soon,
-                "secure": secure,
-                "httpOnly": httpOnly,
-                "sameSite": sameSite
+                "is_expired": 0 < expires <= current_time,
+                "expires_soon": 0 < expires <= expires_soon_cutoff,
+                "secure": cookie.get("secure", False),
+                "httpOnly": cookie.get("httpOnly", False),
+                "sameSite": cookie.get("sameSite", "None")
             })
         
         return result
     
+    # Formatted only for the cookies that are actually printed
+    def expires_human(cookie):
+        expires = cookie["expires"]
+        return time.ctime(expires) if expires > 0 else "Session"
+    
     print("\n📋 INITIAL COOKIE STATE (After Browser Creation)")
     print("-" * 50)
     
@@ -102,7 +100,7 @@ async def debug_google_auth():
             print(f"\n{domain}:")
             for cookie in google_cookies[domain]:
                 status = "❌ EXPIRED" if cookie["is_expired"] else ("⚠️ EXPIRES SOON" if cookie["expires_soon"] else "✅ VALID")
-                print(f"  {cookie['name']}: {status} (expires: {cookie['expires_human']})")
+                print(f"  {cookie['name']}: {status} (expires: {expires_human(cookie)})")
                 print(f"    secure={cookie['secure']}, httpOnly={cookie['httpOnly']}, sameSite={cookie['sameSite']}")
     
     print("\n🌐 NAVIGATION TEST 1: Google.com")
@@ -176,8 +174,14 @@ async def debug_google_auth():
         "accounts.google.com": ["LSID", "__Host-GAPS"]
     }
     
+    # Index cookie names by domain once, then match each critical domain
+    # against the (few) distinct cookie domains rather than every cookie
+    names_by_domain = defaultdict(set)
+    for c in final_cookies:
+        names_by_domain[c.get("domain", "")].add(c.get("name"))
+    
     for domain, required in critical_cookies.items():
-        domain_cookies = [c.get("name") for c in final_cookies if domain in c.get("domain", "")]
+        domain_cookies = set().union(*(names for d, names in names_by_domain.items() if domain in d))
         missing = [name for name in required if name not in domain_cookies]
         if missing:
             missing_critical.append(f"{domain}: {missing}")
@@ -197,6 +201,7 @@ async def debug_google_auth():
         print("  2. SameSite attribute values")
         print("  3. Secure flag requirements")
     
+    await cdp.detach()
     await browser.close()
     return 0
 
@@ -0,0 +1,265 @@
+import asyncio
+import json
+from collections import deque
+
+from starlette.websockets import WebSocketState
+
+from backend.rrweb import event_streamer
+from backend.rrweb.event_streamer import RRWebEvent, RRWebEventStreamer
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.application_state = WebSocketState.CONNECTED
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def _broadcast_all(streamer):
+    async def run():
+        while streamer.pending_count:
+            await streamer.broadcast_events(streamer.take_pending_events())
+    return run()
+
+
+def test_broadcast_shares_frame_and_keeps_per_client_reset():
+    streamer = RRWebEventStreamer("s1")
+    plain_a, plain_b, resetting = _FakeWebSocket(), _FakeWebSocket(), _FakeWebSocket()
+
+    async def run():
+        for ws in (plain_a, plain_b, resetting):
+            await streamer.add_client(ws)
+        streamer.mark_sequence_reset_for_client(resetting, history_window_seconds=0)
+        await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": 1})
+        await streamer.process_rrweb_event({"type": 2, "data": {"node": {}}, "timestamp": 2})
+        await _broadcast_all(streamer)
+
+    asyncio.run(run())
+    assert [m["sequence_id"] for m in plain_a.sent] == [0, 1]
+    assert plain_b.sent == plain_a.sent
+    # The resetting client skips ahead to the FullSnapshot, renumbered from 0
+    assert [(m["event"]["type"], m["sequence_id"]) for m in resetting.sent] == [(2, 0)]
+
+
+def test_broadcast_drops_failing_client_without_blocking_others():
+    streamer = RRWebEventStreamer("s1")
+    healthy, broken = _FakeWebSocket(), _FakeWebSocket()
+
+    async def fail(text):
+        raise RuntimeError("connection reset")
+
+    broken.send_text = fail
+
+    async def run():
+        await streamer.add_client(healthy)
+        await streamer.add_client(broken)
+        await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": 1})
+        return await streamer.broadcast_event(*streamer.take_pending_events())
+
+    assert asyncio.run(run()) == 1
+    assert len(healthy.sent) == 1
+    assert streamer.connected_clients == {healthy}
+
+
+def test_queued_events_are_batched_only_for_opted_in_clients():
+    streamer = RRWebEventStreamer("s1")
+    plain, batching = _FakeWebSocket(), _FakeWebSocket()
+
+    async def run():
+        await streamer.add_client(plain)
+        await streamer.add_client(batching)
+        streamer.enable_batching_for_client(batching)
+        for ts in range(3):
+            await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": ts})
+        events = streamer.take_pending_events()
+        assert len(events) == 3
+        return await streamer.broadcast_events(events)
+
+    assert asyncio.run(run()) == 2
+    assert [m["type"] for m in plain.sent] == ["rrweb_event"] * 3
+    (frame,) = batching.sent
+    assert frame["type"] == "rrweb_batch"
+    assert frame["events"] == plain.sent
+
+
+def test_buffered_replay_reuses_broadcast_frames():
+    streamer = RRWebEventStreamer("s1")
+    live, late = _FakeWebSocket(), _FakeWebSocket()
+
+    async def run():
+        await streamer.add_client(live)
+        for ts in range(2):
+            await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": ts})
+        await _broadcast_all(streamer)
+        cached = [event._frontend_text for event in streamer.event_buffer]
+        streamer.enable_batching_for_client(late)
+        await streamer._send_buffered_events(late)
+        return cached
+
+    cached = asyncio.run(run())
+    assert all(cached)
+    assert late.sent == [{"type": "rrweb_batch", "session_id": "s1", "events": live.sent}]
+
+
+def test_pending_events_rotated_out_of_buffer_are_counted_as_dropped():
+    streamer = RRWebEventStreamer("s1")
+    streamer.event_buffer = deque(maxlen=2)
+
+    async def run():
+        for ts in range(3):
+            await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": ts})
+
+    asyncio.run(run())
+    assert [e.sequence_id for e in streamer.take_pending_events(limit=1)] == [1]
+    assert [e.sequence_id for e in streamer.take_pending_events()] == [2]
+    assert streamer.pending_count == 0
+    assert streamer.stats.dropped_events == 1
+
+
+def test_processing_loop_streams_pending_events():
+    streamer = RRWebEventStreamer("s1")
+    ws = _FakeWebSocket()
+
+    async def run():
+        await streamer.add_client(ws)
+        await streamer.start_streaming()
+        for ts in range(3):
+            await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": ts})
+        for _ in range(10):
+            await asyncio.sleep(0)
+        await streamer.stop_streaming()
+        await asyncio.sleep(0)
+        return streamer._processing_task.done()
+
+    assert asyncio.run(run())
+    assert [m["sequence_id"] for m in ws.sent] == [0, 1, 2]
+
+
+def test_quick_restart_keeps_a_single_processing_loop():
+    streamer = RRWebEventStreamer("s1")
+
+    async def run():
+        await streamer.start_streaming()
+        task = streamer._processing_task
+        await streamer.stop_streaming()
+        await streamer.start_streaming()  # before the loop saw the stop
+        same_task = streamer._processing_task is task
+        await asyncio.sleep(0)
+        alive = not task.done()
+        await streamer.stop_streaming()
+        return same_task, alive
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_stats_snapshot_is_reused_until_stats_change():
+    streamer = RRWebEventStreamer("s1")
+    first = streamer.get_stats()
+    assert streamer.get_stats() is first
+
+    asyncio.run(streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": 1}))
+    after_event = streamer.get_stats()
+    assert after_event is not first and after_event["total_events"] == 1
+
+    asyncio.run(streamer.transition_to_executing())
+    assert streamer.get_stats()["current_phase"] == "executing"
+    assert streamer.get_stats()["truly_ready"] is False  # streaming not started
+
+
+def test_renumbered_frame_matches_full_encode():
+    event = RRWebEvent("s1", 1.5, {"type": 2, "data": {"sequence_id": 9}}, sequence_id=7)
+    assert json.loads(event.frontend_text_as(0)) == {
+        "type": "rrweb_event", "session_id": "s1", "timestamp": 1.5,
+        "event": {"type": 2, "data": {"sequence_id": 9}}, "sequence_id": 0,
+    }
+    assert event.frontend_text_as(7) is event.frontend_text()
+
+
+def test_pointer_moves_are_coalesced_in_replay_buffer():
+    streamer = RRWebEventStreamer("s1")
+    ws = _FakeWebSocket()
+
+    def move(ts):
+        return {"type": 3, "data": {"source": 1, "positions": []}, "timestamp": ts}
+
+    async def run():
+        await streamer.add_client(ws)
+        await streamer.process_rrweb_event(move(1))
+        await streamer.process_rrweb_event(move(2))  # first still pending: kept
+        await _broadcast_all(streamer)
+        await streamer.process_rrweb_event(move(3))  # replaces move 2
+        await _broadcast_all(streamer)
+        await streamer.process_rrweb_event({"type": 3, "data": {"source": 2}, "timestamp": 4})
+        await streamer.process_rrweb_event(move(5))
+        await _broadcast_all(streamer)
+
+    asyncio.run(run())
+    # Live clients see every event; the buffer keeps only the latest move per run
+    assert [m["sequence_id"] for m in ws.sent] == [0, 1, 2, 3, 4]
+    assert [e.sequence_id for e in streamer.event_buffer] == [0, 2, 3, 4]
+
+
+def test_buffered_events_are_compacted_to_their_frame():
+    streamer = RRWebEventStreamer("s1")
+    event = {"type": 4, "data": {"href": "https://example.com"}, "timestamp": 1}
+    asyncio.run(streamer.process_rrweb_event(event))
+
+    (buffered,) = streamer.event_buffer
+    assert buffered.event is None and buffered.event_type == 4
+    assert streamer.get_buffered_events()[0]["event"] == event
+
+
+def test_stalled_client_is_dropped_after_send_timeout(monkeypatch):
+    monkeypatch.setattr(event_streamer, "_CLIENT_SEND_TIMEOUT", 0.01)
+    streamer = RRWebEventStreamer("s1")
+    healthy, stalled = _FakeWebSocket(), _FakeWebSocket()
+
+    async def hang(text):
+        await asyncio.Event().wait()
+
+    stalled.send_text = hang
+
+    async def run():
+        await streamer.add_client(healthy)
+        await streamer.add_client(stalled)
+        await streamer.process_rrweb_event({"type": 3, "data": {}, "timestamp": 1})
+        reached = await streamer.broadcast_events(streamer.take_pending_events())
+        await asyncio.sleep(0)  # let the background close run
+        return reached
+
+    assert asyncio.run(run()) == 1
+    assert streamer.connected_clients == {healthy}
+    # The stalled socket is closed so the viewer reconnects and resyncs
+    assert stalled.close_code == 1011
+    assert healthy.close_code is None
+
+
+def test_phase_transitions_are_recorded_once_and_bounded():
+    streamer = RRWebEventStreamer("s1")
+
+    async def run():
+        await streamer.transition_to_executing()
+        await streamer.transition_to_cleanup()
+        for _ in range(100):
+            await streamer.mark_browser_ready()
+            await streamer.mark_browser_not_ready()
+
+    asyncio.run(run())
+    transitions = streamer.get_stats()["phase_transitions"]
+    assert len(transitions) == event_streamer._MAX_PHASE_TRANSITIONS
+    assert transitions[-1]["milestone"] == "browser_not_ready"
+    assert not hasattr(streamer, "phase_transitions")
+
+    fresh = RRWebEventStreamer("s2")
+    asyncio.run(fresh.transition_to_executing())
+    assert fresh.stats.phase_transitions == [{
+        "from_phase": "setup", "to_phase": "executing", "milestone": "executing_phase",
+        "timestamp": fresh.stats.phase_transitions[0]["timestamp"],
+    }]
@@ -0,0 +1,314 @@
+import asyncio
+import base64
+import json
+import os
+import sys
+import types
+
+from backend import storage_state_manager as ssm
+from backend.storage_state_manager import StorageStateManager
+
+
+def _gen_rsa_keypair():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    priv_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+    pub_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return priv_pem, pub_pem
+
+
+def _encrypt_storage_state(pub_pem: str, state: dict):
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    public_key = serialization.load_pem_public_key(pub_pem.encode())
+    data_key = os.urandom(32)
+    nonce = os.urandom(12)
+    ciphertext = AESGCM(data_key).encrypt(nonce, json.dumps(state).encode(), associated_data=None)
+    wrapped = public_key.encrypt(
+        data_key,
+        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
+    )
+    b64 = lambda b: base64.b64encode(b).decode()
+    return b64(ciphertext), b64(wrapped), b64(nonce)
+
+
+def _manager_with_fake_db(result):
+    manager = StorageStateManager()
+    calls = []
+
+    async def fake_fetch(user_id, site_filter=None):
+        calls.append((user_id, site_filter))
+        await asyncio.sleep(0.01)
+        return result
+
+    manager._fetch_from_database = fake_fetch
+    return manager, calls
+
+
+def test_database_load_is_cached_and_deduplicated():
+    result = {"state": {"cookies": [], "origins": []}, "record_id": "st_test"}
+    manager, calls = _manager_with_fake_db(result)
+
+    async def run():
+        first, second = await asyncio.gather(
+            manager._load_from_database("user-1"),
+            manager._load_from_database("user-1"),
+        )
+        third = await manager._load_from_database("user-1")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == second == third == result
+    assert calls == [("user-1", None)]
+
+
+def test_invalidate_cache_forces_reload():
+    result = {"state": {"cookies": [], "origins": []}, "record_id": "st_test"}
+    manager, calls = _manager_with_fake_db(result)
+
+    async def run():
+        await manager._load_from_database("user-1", "google")
+        manager.invalidate_cache("user-1")
+        await manager._load_from_database("user-1", "google")
+
+    asyncio.run(run())
+    assert calls == [("user-1", "google"), ("user-1", "google")]
+
+
+def test_database_misses_are_not_cached():
+    manager, calls = _manager_with_fake_db(None)
+
+    async def run():
+        await manager._load_from_database("user-1")
+        await manager._load_from_database("user-1")
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_decrypt_reuses_unwrapped_data_key():
+    priv_pem, pub_pem = _gen_rsa_keypair()
+    state = {"cookies": [{"name": "SID", "value": "x", "domain": ".google.com"}], "origins": []}
+    ciphertext, wrapped, nonce = _encrypt_storage_state(pub_pem, state)
+    manager = StorageStateManager()
+
+    os.environ["COOKIE_PRIVATE_KEY_PEM"] = priv_pem
+    ssm._private_key.cache_clear()
+    try:
+        assert asyncio.run(manager._decrypt_storage_state(ciphertext, wrapped, nonce)) == state
+    finally:
+        os.environ.pop("COOKIE_PRIVATE_KEY_PEM", None)
+        ssm._private_key.cache_clear()
+
+    # Private key no longer configured: only the cached cipher can decrypt
+    assert asyncio.run(manager._decrypt_storage_state(ciphertext, wrapped, nonce)) == state
+
+
+def test_verify_cookies_domain_matching():
+    manager = StorageStateManager()
+    cookies = [
+        {"name": "SID", "domain": ".google.com"},
+        {"name": "SIDCC", "domain": "Google.com"},
+        {"name": "li_at", "domain": "linkedin.com"},
+        {"name": "c_user", "domain": "www.facebook.com"},
+        {"name": "sid_tt", "domain": ".tiktok.com"},
+        {"name": "sessionid", "domain": "notinstagram.com"},
+    ]
+    assert manager._verify_cookies(cookies, []) == {
+        "google": True,
+        "linkedin": False,  # bare linkedin.com is not accepted for li_at
+        "instagram": False,
+        "facebook": False,  # xs missing
+        "tiktok": True,
+    }
+    assert manager._verify_cookies(cookies, ["google", "unknown"]) == {"google": True}
+
+
+def test_validate_google_cookie_completeness():
+    manager = StorageStateManager()
+    cookies = [
+        {"name": "SID", "domain": ".google.com"},
+        {"name": "SIDCC", "domain": ".google.com"},
+        {"name": "__Host-GAPS", "domain": "accounts.google.com"},
+        {"name": "OSID", "domain": "docs.google.com"},
+    ]
+    assert manager.validate_google_cookie_completeness(cookies) == {
+        "google_apex": True,
+        "google_accounts": True,
+        "google_docs": False,  # OSID must be scoped below docs.google.com
+    }
+
+
+def test_load_from_environment_variable(monkeypatch):
+    state = {"cookies": [{"name": "SID", "domain": ".google.com"}], "origins": []}
+    monkeypatch.setenv("STORAGE_STATE_JSON_B64", base64.b64encode(json.dumps(state).encode()).decode())
+    manager = StorageStateManager()
+
+    loaded = asyncio.run(manager.load_storage_state_with_priority(force_source="env"))
+    assert loaded == {"state": state, "source": "environment"}
+
+
+def test_user_file_save_and_load_roundtrip(monkeypatch, tmp_path):
+    monkeypatch.setattr(ssm, "_feature_use_cookies", lambda: False)
+    manager = StorageStateManager()
+    manager.base_profile_dir = tmp_path
+    state = {"cookies": [{"name": "SID", "domain": ".google.com"}], "origins": []}
+
+    async def run():
+        saved = await manager.save_storage_state_with_strategy("user-1", state)
+        loaded = await manager.load_storage_state_with_priority(user_id="user-1", force_source="user_file")
+        return saved, loaded
+
+    saved, loaded = asyncio.run(run())
+    assert saved["target"] == "user_file"
+    assert loaded == {"state": state, "source": "user_file"}
+
+
+class _FakeSupabase:
+    def __init__(self):
+        self.inserts = []
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        self.inserts.append(rows)
+        return self
+
+    def execute(self):
+        return None
+
+
+def test_concurrent_inserts_are_batched(monkeypatch):
+    fake = _FakeSupabase()
+    monkeypatch.setitem(sys.modules, "backend.dependencies", types.SimpleNamespace(supabase=fake))
+    manager = StorageStateManager()
+
+    async def run():
+        await asyncio.gather(*(manager._insert_cookie_upload({"id": f"st_{i}"}) for i in range(3)))
+
+    asyncio.run(run())
+    assert fake.inserts == [[{"id": "st_0"}, {"id": "st_1"}, {"id": "st_2"}]]
+
+
+def test_save_locks_are_released_after_save(monkeypatch, tmp_path):
+    monkeypatch.setattr(ssm, "_feature_use_cookies", lambda: False)
+    manager = StorageStateManager()
+    manager.base_profile_dir = tmp_path
+
+    asyncio.run(manager.save_storage_state_with_strategy("user-1", {"cookies": [], "origins": []}))
+    assert "user-1" not in manager._save_locks
+
+
+def test_save_to_database_roundtrip(monkeypatch):
+    priv_pem, pub_pem = _gen_rsa_keypair()
+    monkeypatch.setenv("COOKIE_PRIVATE_KEY_PEM", priv_pem)
+    monkeypatch.setenv("COOKIE_PUBLIC_KEY_PEM", pub_pem)
+    ssm._private_key.cache_clear()
+    ssm._public_key.cache_clear()
+    fake = _FakeSupabase()
+    monkeypatch.setitem(sys.modules, "backend.dependencies", types.SimpleNamespace(supabase=fake))
+    manager = StorageStateManager()
+    state = {"cookies": [{"name": "SID", "domain": ".google.com"}, {"name": "SIDCC", "domain": ".google.com"}], "origins": []}
+
+    try:
+        saved = asyncio.run(manager._save_to_database("user-1", state, {"sites": ["google"]}))
+        (row,) = fake.inserts[0]
+        decrypted = asyncio.run(manager._decrypt_storage_state(row["ciphertext"], row["wrapped_key"], row["nonce"]))
+    finally:
+        ssm._private_key.cache_clear()
+        ssm._public_key.cache_clear()
+
+    assert saved["status"] == "verified"
+    assert row["metadata"]["size_bytes"] == len(base64.b64decode(row["ciphertext"]))
+    assert decrypted == state
+
+
+def test_filter_expired_cookies():
+    manager = StorageStateManager()
+    session = {"name": "a", "expires": -1}
+    future = {"name": "b", "expires": 4102444800}
+    no_expiry = {"name": "c"}
+    expired = {"name": "d", "expires": 1}
+    assert manager.filter_expired_cookies([session, future, no_expiry, expired]) == [session, future, no_expiry]
+
+
+def test_slow_database_hedges_to_user_file_only_with_deadline(monkeypatch, tmp_path):
+    db_result = {"state": {"cookies": [], "origins": [], "from": "db"}, "record_id": "st_db"}
+    file_state = {"cookies": [], "origins": [], "from": "file"}
+    manager, _ = _manager_with_fake_db(db_result)
+    manager.base_profile_dir = tmp_path
+    (tmp_path / "user-1").mkdir()
+    (tmp_path / "user-1" / "storage_state.json").write_text(json.dumps(file_state))
+    monkeypatch.setattr(ssm, "_feature_use_cookies", lambda: True)
+
+    loaded = asyncio.run(manager.load_storage_state_with_priority(user_id="user-1"))
+    assert loaded["source"] == "database"
+
+    manager.invalidate_cache("user-1")
+    monkeypatch.setenv("STORAGE_STATE_DB_SOFT_DEADLINE_SECONDS", "0.001")
+    loaded = asyncio.run(manager.load_storage_state_with_priority(user_id="user-1"))
+    assert loaded["source"] == "user_file"
+    assert loaded["state"] == file_state
+
+
+class _SlowSupabaseQuery:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def table(self, name):
+        return self
+
+    def __getattr__(self, name):
+        # select/eq/order/limit/contains all chain
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        import time
+        time.sleep(self.delay)
+        return types.SimpleNamespace(data=[])
+
+
+def test_slow_database_query_does_not_block_the_hedge(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "backend.dependencies", types.SimpleNamespace(supabase=_SlowSupabaseQuery(0.3)))
+    monkeypatch.setattr(ssm, "_feature_use_cookies", lambda: True)
+    monkeypatch.setenv("STORAGE_STATE_DB_SOFT_DEADLINE_SECONDS", "0.02")
+    manager = StorageStateManager()
+    manager.base_profile_dir = tmp_path
+    (tmp_path / "user-1").mkdir()
+    (tmp_path / "user-1" / "storage_state.json").write_text(json.dumps({"cookies": [], "origins": []}))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        loaded = await manager.load_storage_state_with_priority(user_id="user-1")
+        return loaded, loop.time() - started
+
+    loaded, elapsed = asyncio.run(run())
+    assert loaded["source"] == "user_file"
+    assert elapsed < 0.2
+
+
+def test_cancelled_database_load_does_not_cancel_other_callers():
+    result = {"state": {"cookies": [], "origins": []}, "record_id": "st_test"}
+    manager, calls = _manager_with_fake_db(result)
+
+    async def run():
+        leader = asyncio.create_task(manager._load_from_database("user-1"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(manager._load_from_database("user-1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == result
+    assert calls == [("user-1", None)]
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from backend.rrweb.streamers_manager import RRWebStreamersManager
+
+
+def test_cleanup_only_removes_sessions_whose_check_is_due_and_idle():
+    manager = RRWebStreamersManager()
+    manager._cleanup_task_started = True  # Drive the loop by hand below
+
+    async def run():
+        for session_id in ("idle", "active", "not_due"):
+            manager.get_or_create_streamer(session_id)
+        active = manager.streamers["active"]
+        active.connected_clients.add(object())
+        active.streaming_active = True
+        manager._schedule_check("idle", 0)
+        manager._schedule_check("active", 0)
+
+        task = asyncio.create_task(manager._cleanup_inactive_sessions())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+    assert sorted(manager.streamers) == ["active", "not_due"]
+    # The active session was rescheduled a full interval out
+    assert manager._next_check["active"] > time.time() + manager.cleanup_interval - 5
+    assert "idle" not in manager._next_check
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import orjson
+
+from backend.rrweb.streamers_manager import rrweb_streamers_manager
+from backend.websocket_manager import VisualWebSocketManager, WebSocketConnection
+
+
+class _FakeWebSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def accept(self):
+        pass
+
+    async def send_bytes(self, data):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(orjson.loads(data))
+
+
+def _connect(manager, session_id, client_id, websocket):
+    connection = WebSocketConnection(
+        websocket=websocket, session_id=session_id, client_id=client_id, connected_at=time.time()
+    )
+    manager.connections[client_id] = connection
+    manager.session_connections.setdefault(session_id, {})[client_id] = connection
+
+
+def test_broadcast_to_session_sends_to_all_and_drops_failed_clients():
+    manager = VisualWebSocketManager()
+    healthy_a, healthy_b, broken = _FakeWebSocket(), _FakeWebSocket(), _FakeWebSocket(fail=True)
+    _connect(manager, "s1", "a", healthy_a)
+    _connect(manager, "s1", "b", healthy_b)
+    _connect(manager, "s1", "broken", broken)
+
+    async def run():
+        sent = await manager.broadcast_to_session("s1", {"type": "ping"})
+        # The failed client is disconnected by the cleanup loop, not the broadcast
+        assert "broken" in manager.session_connections["s1"]
+        await asyncio.sleep(0)
+        return sent
+
+    assert asyncio.run(run()) == 2
+    assert healthy_a.sent == healthy_b.sent == [{"type": "ping"}]
+    assert list(manager.session_connections["s1"]) == ["a", "b"]
+    assert manager.stats["messages_sent"] == 2
+    assert manager.stats["messages_failed"] == 1
+    assert manager.stats["bytes_sent"] == 2 * len(orjson.dumps({"type": "ping"}))
+
+
+def test_large_broadcast_is_sent_in_batches():
+    manager = VisualWebSocketManager()
+    manager.broadcast_batch_size = 2
+    sockets = [_FakeWebSocket() for _ in range(5)]
+    for i, websocket in enumerate(sockets):
+        _connect(manager, "s1", f"c{i}", websocket)
+    sockets[3].fail = True
+
+    async def run():
+        sent = await manager.broadcast_to_session("s1", {"type": "ping"})
+        await asyncio.sleep(0)
+        return sent
+
+    assert asyncio.run(run()) == 4
+    assert sum(len(websocket.sent) for websocket in sockets) == 4
+    assert "c3" not in manager.session_connections["s1"]
+
+
+def test_ping_gets_pong():
+    manager = VisualWebSocketManager()
+    websocket = _FakeWebSocket()
+    _connect(manager, "s1", "a", websocket)
+
+    before = time.time()
+    asyncio.run(manager._handle_client_message("a", {"type": "ping"}))
+    (pong,) = websocket.sent
+    assert pong["type"] == "pong" and pong["timestamp"] >= before
+
+
+def test_connection_counts_are_read_from_live_tracking():
+    manager = VisualWebSocketManager()
+    _connect(manager, "s1", "a", _FakeWebSocket())
+    _connect(manager, "s2", "b", _FakeWebSocket())
+    asyncio.run(manager.handle_client_disconnection("b"))
+
+    stats = manager.get_all_stats()["websocket_stats"]
+    assert stats["active_connections"] == 1
+    assert stats["total_sessions"] == 1
+
+
+def test_connects_in_the_same_millisecond_get_distinct_client_ids(monkeypatch):
+    manager = VisualWebSocketManager()
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.0)
+
+    async def run():
+        first = await manager.handle_client_connection(_FakeWebSocket(), "visual-test")
+        second = await manager.handle_client_connection(_FakeWebSocket(), "visual-test")
+        for client_id in (first, second):
+            await manager.handle_client_disconnection(client_id)
+        await rrweb_streamers_manager.remove_streamer("visual-test")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first != second
+
+
+def test_client_messages_are_dispatched_by_type():
+    manager = VisualWebSocketManager()
+    websocket = _FakeWebSocket()
+    _connect(manager, "s1", "a", websocket)
+
+    async def run():
+        await manager._handle_client_message("a", {"type": "get_status"})
+        await manager._handle_client_message("a", {"type": "no_such_type"})
+
+    asyncio.run(run())
+    (status,) = websocket.sent
+    assert status["type"] == "status" and status["data"]["client_id"] == "a"
+
+
+def test_failed_direct_send_disconnects_client():
+    manager = VisualWebSocketManager()
+    _connect(manager, "s1", "a", _FakeWebSocket(fail=True))
+
+    async def run():
+        sent = await manager.send_to_client("a", {"type": "pong"})
+        return sent, await manager.handle_client_disconnection("a")
+
+    assert asyncio.run(run()) == (False, False)
+    assert manager.connections == {} and manager.session_connections == {}
+    assert manager.stats["messages_failed"] == 1
+
+
+def test_session_client_count():
+    manager = VisualWebSocketManager()
+    _connect(manager, "s1", "a", _FakeWebSocket())
+    _connect(manager, "s1", "b", _FakeWebSocket())
+    assert manager.get_session_client_count("s1") == 2
+    assert manager.get_session_client_count("missing") == 0
+
+
+def test_failed_broadcast_cleanup_works_across_event_loops():
+    manager = VisualWebSocketManager()
+
+    async def fail_and_clean(client_id):
+        _connect(manager, "s1", client_id, _FakeWebSocket(fail=True))
+        await manager.broadcast_to_session("s1", {"type": "ping"})
+        await asyncio.sleep(0)
+        return manager._cleanup_task
+
+    first_task = asyncio.run(fail_and_clean("a"))
+    second_task = asyncio.run(fail_and_clean("b"))
+    assert second_task is not first_task
+    assert manager.connections == {} and manager.session_connections == {}